@@ -204,7 +204,7 @@ class Config(commands.Cog):
     @autopost.group(name="setup")
     async def autopost_setup(self, ctx) -> None:
         """Autopost Minecraft News"""
-        categories = ("release", "snapshot", "article", "outage")
+        categories = ("release", "snapshot", "article", "outage", "server")
         cat = {}
 
         def channel_check(m: discord.Message):
@@ -265,7 +265,7 @@ class Config(commands.Cog):
     @autopost.group(name="edit")
     async def autopost_edit(self, ctx) -> None:
         """Autopost Minecraft News"""
-        categories = ("release", "snapshot", "article", "outage")
+        categories = ("release", "snapshot", "article", "outage", "server")
         cat = {}
 
     @autopost.group(name="settings")
@@ -334,12 +334,12 @@ class Config(commands.Cog):
 
         await ctx.send(_("What is the ip address of your minecraft server"))
         try:
-            config["address"] = await self.bot.wait_for(
-                "message", check=author_check, timeout=15.0
-            )
+            config["server"] = (
+                await self.bot.wait_for("message", check=author_check, timeout=15.0)
+            ).content
             embed.add_field(
                 name=_("Address"),
-                value=config["address"],
+                value=config["server"],
             )
         except asyncio.TimeoutError:
             await ctx.send(_("Response timed out."))
@@ -348,7 +348,11 @@ class Config(commands.Cog):
         await ctx.send(_("What is the port of your minecraft server"))
         try:
             config["port"] = int(
-                await self.bot.wait_for("message", check=author_check, timeout=15.0)
+                (
+                    await self.bot.wait_for(
+                        "message", check=author_check, timeout=15.0
+                    )
+                ).content
             )
             embed.add_field(
                 name=_("Port"),
@@ -359,9 +363,9 @@ class Config(commands.Cog):
             return
         await ctx.send(_("What is the password of your minecraft server rcon"))
         try:
-            config["password"] = await self.bot.wait_for(
-                "message", check=author_check, timeout=15.0
-            )
+            config["password"] = (
+                await self.bot.wait_for("message", check=author_check, timeout=15.0)
+            ).content
             embed.add_field(
                 name=_("Password"),
                 value="************",
@@ -396,7 +400,7 @@ class Config(commands.Cog):
             await ctx.send(_("Response timed out."))
             return
 
-        await self.bot._rcon_cache.set_rcon(ctx.guild, config)
+        await self.bot._rcon_cache.set_rcon(ctx.guild, **config)
         await ctx.send(embed=embed)
 
     @rconconfig.group(name="edit")
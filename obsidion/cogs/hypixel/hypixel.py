@@ -1,4 +1,5 @@
 """Images cog."""
+import asyncio
 import logging
 import datetime
 from dpymenus import Page, PaginatedMenu
@@ -11,6 +12,8 @@ from obsidion.core.i18n import cog_i18n
 from obsidion.core.i18n import Translator
 from obsidion.core.utils.chat_formatting import humanize_timedelta
 from obsidion.core.utils.utils import divide_array
+from .quota import HypixelQuota
+from typing import List
 from typing import Optional
 from discord_slash import cog_ext
 from discord_slash.utils.manage_commands import create_option
@@ -26,13 +29,18 @@ class Hypixel(commands.Cog):
     def __init__(self, bot) -> None:
         """Init."""
         self.bot = bot
-        self.hypixel = _Hypixel(get_settings().HYPIXEL_API_TOKEN)
+        self.hypixel = HypixelQuota(_Hypixel(get_settings().HYPIXEL_API_TOKEN))
+        self.hypixel.sync.start()
+
+    def cog_unload(self) -> None:
+        """Stop syncing the Hypixel quota on cog unload."""
+        self.hypixel.sync.cancel()
 
     @commands.command()
     async def watchdogstats(self, ctx) -> None:
         """Get the current watchdog statistics."""
         await ctx.channel.trigger_typing()
-        data = await self.hypixel.watchdog_stats()
+        data = await self.hypixel.request("watchdog_stats")
         embed = discord.Embed(title=_("Watchdog Stats"), colour=self.bot.color)
         embed.add_field(
             name=_("Total Bans"), value=f"{(data.watchdog_total + data.staff_total):,}"
@@ -57,7 +65,7 @@ class Hypixel(commands.Cog):
     async def boosters(self, ctx) -> None:
         """Get the current boosters online."""
         await ctx.channel.trigger_typing()
-        data = await self.hypixel.boosters()
+        data = await self.hypixel.request("boosters")
         embed = discord.Embed(
             title=_("Boosters"),
             description=_(f"Total Boosters online: {len(data.boosters)}"),
@@ -85,7 +93,7 @@ class Hypixel(commands.Cog):
     async def playercount(self, ctx) -> None:
         """Get the current players online."""
         await ctx.channel.trigger_typing()
-        data = await self.hypixel.player_count()
+        data = await self.hypixel.request("player_count")
         embed = discord.Embed(
             title=_("Players Online"),
             description=_(f"Total players online: {data}"),
@@ -113,7 +121,7 @@ class Hypixel(commands.Cog):
     async def skyblocknews(self, ctx) -> None:
         """Get current news for skyblock."""
         await ctx.channel.trigger_typing()
-        data = await self.hypixel.news()
+        data = await self.hypixel.request("news")
         embed = discord.Embed(
             title=_("Skyblock News"),
             description=_(f"There are currently {len(data)} news articles."),
@@ -153,7 +161,7 @@ class Hypixel(commands.Cog):
         player_data = await self.bot.mojang_player(ctx.author, username)
         uuid = player_data["uuid"]
 
-        data = await self.hypixel.player_status(uuid)
+        data = await self.hypixel.request("player_status", uuid)
 
         if data.online == False:
             await ctx.send("That player is not currently online.")
@@ -202,7 +210,7 @@ class Hypixel(commands.Cog):
         player_data = await self.bot.mojang_player(ctx.author, username)
         uuid = player_data["uuid"]
 
-        data = await self.hypixel.player_friends(uuid)
+        data = await self.hypixel.request("player_friends", uuid)
 
         embed = discord.Embed(
             title=_("Player Friends"),
@@ -217,17 +225,19 @@ class Hypixel(commands.Cog):
         embed.set_thumbnail(url=f"https://visage.surgeplay.com/bust/{uuid}")
         embed.timestamp = ctx.message.created_at
 
-        for i in range(len(data)):
-            if str(data[i].uuid_receiver) == str(uuid):
-                friendUsername = await self.bot.mojang_player(
-                    ctx.author, data[i].uuid_sender
-                )
-            else:
-                friendUsername = await self.bot.mojang_player(
-                    ctx.author, data[i].uuid_receiver
-                )
+        friends = await self.bot.resolve_players(
+            [
+                str(friend.uuid_sender)
+                if str(friend.uuid_receiver) == str(uuid)
+                else str(friend.uuid_receiver)
+                for friend in data
+            ]
+        )
 
-            friendUsername = friendUsername["username"]
+        for i in range(len(data)):
+            if friends[i] is None:
+                continue
+            friendUsername = friends[i]["username"]
 
             delta = datetime.datetime.now(tz=datetime.timezone.utc) - data[i].started
             friendStarted = humanize_timedelta(timedelta=delta)
@@ -260,7 +270,7 @@ class Hypixel(commands.Cog):
         await ctx.channel.trigger_typing()
 
         menu = PaginatedMenu(ctx)
-        data = await self.hypixel.bazaar()
+        data = await self.hypixel.request("bazaar")
         split = list(divide_array(data.bazaar_items, 15))
         pagesend = []
 
@@ -302,7 +312,7 @@ class Hypixel(commands.Cog):
         """Get the first 30 auctions."""
 
         await ctx.channel.trigger_typing()
-        data = await self.hypixel.auctions()
+        data = await self.hypixel.request("auctions")
         menu = PaginatedMenu(ctx)
         split = list(divide_array(data.auctions, 9))
         auctionitems = split[:3]
@@ -349,7 +359,7 @@ class Hypixel(commands.Cog):
     async def guild(self, ctx: commands.Context, guildname: str) -> None:
         """Get's guild info by guild name."""
         await ctx.channel.trigger_typing()
-        data = await self.hypixel.guild_by_name(guildname)
+        data = await self.hypixel.request("guild_by_name", guildname)
         
         embed = discord.Embed(title=_("Guild Info"), description=_(f"Guild info for {guildname}"), colour=self.bot.color)
         embed.set_author(name=_("Hypixel"), url="https://hypixel.net/forums/skyblock.157/", icon_url="https://hypixel.net/favicon-32x32.png")
@@ -370,38 +380,88 @@ class Hypixel(commands.Cog):
         await ctx.defer()
         await self.guild(ctx, guildname)
 
+    async def fill_leaderboard_page(
+        self, menu: PaginatedMenu, page: Page, leaders: List[str]
+    ) -> bool:
+        """Resolve a leaderboard's players and replace the page's placeholder.
+
+        Returns whether it worked. On failure the placeholder is replaced
+        with an error instead, so the page is never left loading. If the
+        menu is showing the page already, its message is updated too.
+        """
+        try:
+            players = await self.bot.resolve_players(
+                [str(leader) for leader in leaders]
+            )
+        except Exception:
+            log.exception("Could not resolve leaderboard players")
+            value = _("Could not load this leaderboard.")
+            ok = False
+        else:
+            value = "".join(
+                f"{player_data['username']} \n"
+                for player_data in players
+                if player_data is not None
+            )
+            ok = True
+        page.set_field_at(
+            0,
+            name=_(f"Top {len(leaders)} Leaderboard"),
+            value=value or "\u200b",
+        )
+        if menu.output is not None and menu.page is page:
+            try:
+                await menu.output.edit(embed=page.as_safe_embed())
+            except discord.HTTPException as e:
+                log.debug("Could not update leaderboard page: %s", e)
+        return ok
+
     @commands.command()
     async def leaderboards(self, ctx: commands.Context) -> None:
         """Get current hypixel leaderboards"""
         await ctx.channel.trigger_typing()
 
-        data = await self.hypixel.leaderboards()
+        data = await self.hypixel.request("leaderboards")
         menu = PaginatedMenu(ctx)
-        pagesend= []
-        pagenumber = 1
-
-        for i in data:
-            if data[i]:
-                pageleader = Page(title=_(f"Current Hypixel Leaderboards for {data[i][0].title}"), description=_(f"Page {pagenumber} of {len(data)}"), color=self.bot.color)
-                pageleader.set_author(name=_("Hypixel"), icon_url="https://hypixel.net/favicon-32x32.png")
-                pageleader.set_thumbnail(url="https://hypixel.net/styles/hypixel-v2/images/header-logo.png")
-                leaderstring = ""
-
-                for leader in range(len(data[i][0].leaders)):
-                    player_data = await self.bot.mojang_player(ctx.author, data[i][0].leaders[leader])
-                    username = player_data["username"]
-                    leaderstring += f"{username} \n"
-                pageleader.add_field(name=_(f"Top {len(data[i][0].leaders)} Leaderboard"), value=_(leaderstring))
-
-                pagesend.append(pageleader)
-                pagenumber += 1
-                
+        boards = [data[i][0] for i in data if data[i]]
+        pagesend = []
+        fills = []
+
+        # Every page is created up front with a placeholder and filled in
+        # concurrently, so the menu can open as soon as the first page is
+        # ready and later pages are completed while the user paginates.
+        for pagenumber, board in enumerate(boards, start=1):
+            pageleader = Page(title=_(f"Current Hypixel Leaderboards for {board.title}"), description=_(f"Page {pagenumber} of {len(boards)}"), color=self.bot.color)
+            pageleader.set_author(name=_("Hypixel"), icon_url="https://hypixel.net/favicon-32x32.png")
+            pageleader.set_thumbnail(url="https://hypixel.net/styles/hypixel-v2/images/header-logo.png")
+            pageleader.add_field(name=_(f"Top {len(board.leaders)} Leaderboard"), value=_("Loading..."))
+
+            pagesend.append(pageleader)
+            fills.append(
+                asyncio.create_task(
+                    self.fill_leaderboard_page(menu, pageleader, board.leaders)
+                )
+            )
+
+        if fills and not await fills[0]:
+            for fill in fills[1:]:
+                fill.cancel()
+            await asyncio.gather(*fills, return_exceptions=True)
+            embed = discord.Embed(colour=discord.Colour.red())
+            embed.description = _("Could not load the Hypixel leaderboards.")
+            await ctx.send(embed=embed)
+            return
         menu.add_pages(pagesend)
         menu.set_timeout(90)
         menu.allow_multisession()
 
-        await menu.open()
-    
+        try:
+            await menu.open()
+        finally:
+            for fill in fills:
+                fill.cancel()
+            await asyncio.gather(*fills, return_exceptions=True)
+
     @cog_ext.cog_slash(name="leaderboards")
     async def slash_auctions(self, ctx):
         """Get's guild info by guild name."""
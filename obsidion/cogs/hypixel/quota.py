@@ -0,0 +1,96 @@
+"""Quota aware access to the Hypixel API."""
+import asyncio
+import logging
+from typing import Any
+from typing import Dict
+from typing import NamedTuple
+
+from asyncpixel import Hypixel as _Hypixel
+from discord.ext import tasks
+from obsidion.core.http import TokenBucket
+from obsidion.core.player_cache import SingleFlight
+from obsidion.core.settings_cache import LocalCache
+from obsidion.core.settings_cache import MISSING
+
+log = logging.getLogger(__name__)
+
+# Requests are either for someone waiting on a reply or bulk data that can
+# wait a little when the budget runs low.
+HIGH = 0
+LOW = 1
+
+
+class Endpoint(NamedTuple):
+    ttl: float
+    priority: int
+
+
+ENDPOINTS = {
+    "watchdog_stats": Endpoint(ttl=60, priority=HIGH),
+    "boosters": Endpoint(ttl=60, priority=HIGH),
+    "player_count": Endpoint(ttl=60, priority=HIGH),
+    "news": Endpoint(ttl=600, priority=HIGH),
+    "player_status": Endpoint(ttl=30, priority=HIGH),
+    "player_friends": Endpoint(ttl=300, priority=HIGH),
+    "guild_by_name": Endpoint(ttl=300, priority=HIGH),
+    "bazaar": Endpoint(ttl=60, priority=LOW),
+    "auctions": Endpoint(ttl=60, priority=LOW),
+    "leaderboards": Endpoint(ttl=300, priority=LOW),
+}
+
+
+class HypixelQuota:
+    """Wrapper around the asyncpixel client that stays within the key's quota.
+
+    Every request takes a token from a bucket refilling at the key's limit,
+    which is kept in step with the usage Hypixel reports for the key. When
+    fewer than `reserve` tokens are left, low priority requests wait so
+    interactive ones still get through. Responses are cached per endpoint
+    and concurrent identical requests share one call.
+    """
+
+    def __init__(self, client: _Hypixel, limit: int = 120, reserve: int = 20) -> None:
+        self.client = client
+        self.reserve = reserve
+        self.bucket = TokenBucket(limit / 60, limit)
+        self.cache = LocalCache(maxsize=1000)
+        self._flight = SingleFlight()
+
+    async def _acquire(self, priority: int) -> None:
+        while priority == LOW and self.bucket.tokens < self.reserve:
+            await asyncio.sleep((self.reserve - self.bucket.tokens) / self.bucket.rate)
+        await self.bucket.acquire()
+
+    async def request(self, endpoint: str, *args: Any) -> Any:
+        """Call an asyncpixel endpoint, e.g. ``request("player_status", uuid)``."""
+        policy = ENDPOINTS[endpoint]
+        key = ":".join(map(str, (endpoint, *args)))
+        result = self.cache.get(key)
+        if result is not MISSING:
+            return result
+
+        async def fetch() -> Any:
+            await self._acquire(policy.priority)
+            result = await getattr(self.client, endpoint)(*args)
+            self.cache.set(key, result, ttl=policy.ttl)
+            return result
+
+        return await self._flight.do(key, fetch)
+
+    @tasks.loop(minutes=1)
+    async def sync(self) -> None:
+        """Match the bucket to the key's limit and recent usage."""
+        try:
+            key = await self.client.key_data()
+        except Exception as e:
+            log.warning("Could not read Hypixel key usage: %s", e)
+            return
+        if key.limit != self.bucket.capacity:
+            self.bucket.capacity = key.limit
+            self.bucket.rate = key.limit / 60
+        self.bucket.set_tokens(
+            min(self.bucket.tokens, key.limit - key.queries_in_past_min)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {"tokens": round(self.bucket.tokens, 1), **self.cache.stats()}
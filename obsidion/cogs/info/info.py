@@ -3,20 +3,22 @@ import io
 import json
 import logging
 from datetime import datetime
-from typing import Optional, Tuple
+from typing import Any, Dict, Optional, Tuple
 import base64
+import binascii
 import pytz
-from time import mktime
 
 
 import discord
 from discord.ext import commands
-from obsidion.core import get_settings
 from obsidion.core.i18n import cog_i18n
 from obsidion.core.i18n import Translator
+from obsidion.core.server_ping import ping_java
+from obsidion.core.server_ping import ServerUnreachable
+from obsidion.core.server_monitor import split_address
+from .wiki import WikiClient
 from discord_slash import cog_ext
 from discord_slash.utils.manage_commands import create_option
-import feedparser
 
 
 log = logging.getLogger(__name__)
@@ -29,6 +31,12 @@ class Info(commands.Cog):
     def __init__(self, bot) -> None:
         """Init."""
         self.bot = bot
+        self.wiki = WikiClient(bot)
+        self.wiki.refresh_index.start()
+
+    def cog_unload(self) -> None:
+        """Stop rebuilding the wiki index on cog unload."""
+        self.wiki.refresh_index.cancel()
 
     @commands.command(
         aliases=["whois", "p", "names", "namehistory", "pastnames", "namehis"]
@@ -131,36 +139,70 @@ class Info(commands.Cog):
             return (ip, port)
         return (ip, None)
 
+    async def linked_server(
+        self, guild: discord.Guild, port: Optional[int]
+    ) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """The guild's linked address and its latest background snapshot.
+
+        The snapshot is only used when `port` is None or matches the linked
+        port, otherwise the linked host is returned to ping on `port`.
+        """
+        linked = await self.bot._guild_cache.get_server(guild)
+        if linked is None:
+            return None, None
+        host, linked_port = split_address(linked)
+        if port is not None and port != linked_port:
+            return host, None
+        # Linked servers are pinged in the background.
+        return linked, await self.bot.server_monitor.get_snapshot(linked)
+
+    async def java_status(
+        self, server_ip: str, port: Optional[int]
+    ) -> Optional[Dict[str, Any]]:
+        """Ping a Java server, caching the result for a while."""
+        key = f"server_{server_ip}:{port}"
+        raw = await self.bot.redis.get(key)
+        if raw is not None:
+            return json.loads(raw)
+        try:
+            data = await ping_java(server_ip, port)
+        except ServerUnreachable:
+            data = None
+        await self.bot.redis.set(
+            key, json.dumps(data), expire=600 if data is not None else 60
+        )
+        return data
+
+    @staticmethod
+    def favicon(icon: Optional[str]) -> Optional[discord.File]:
+        """Turn a favicon data URI into an attachment, if it decodes."""
+        if not icon:
+            return None
+        try:
+            data = base64.b64decode(icon.split(",", 1)[1])
+        except (IndexError, binascii.Error):
+            log.debug("Bad favicon %.40s", icon)
+            return None
+        return discord.File(io.BytesIO(data), filename="icon.png")
+
     @commands.command()
     async def server(
         self, ctx, address: Optional[str] = None, port: Optional[int] = None
     ):
         """Minecraft server info."""
         await ctx.channel.trigger_typing()
+        snapshot = None
         if address is None:
-            address = await self.bot._guild_cache.get_server(ctx.guild)
+            address, snapshot = await self.linked_server(ctx.guild, port)
         if address is None:
             await ctx.send(_("Please provide a server"))
             return
         server_ip, _port = self.get_server(address, port)
         port = _port if _port else port
-        key = f"server_{server_ip}:{port}"
-        if await self.bot.redis.exists(key):
-            data = json.loads(await self.bot.redis.get(key))
+        if snapshot is not None:
+            data = snapshot["data"]
         else:
-            params = (
-                {"server": address}
-                if port is None
-                else {"server": address, "port": port}
-            )
-            async with self.bot.http_session.get(
-                f"{get_settings().API_URL}/server/java", params=params
-            ) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                else:
-                    data = None
-            await self.bot.redis.set(key, json.dumps(data), expire=600)
+            data = await self.java_status(server_ip, port)
         if data is None:
             await ctx.send(_("server could not be reached."))
             return
@@ -183,11 +225,10 @@ class Info(commands.Cog):
             ).format(version=data["version"], protocol=data["protocol"]),
             inline=False,
         )
-        if data["icon"]:
-            url = f"{get_settings().API_URL}/server/javaicon?server={server_ip}"
-            if port is not None:
-                url += f"&port={port}"
-            embed.set_thumbnail(url=url)
+        # The favicon is a data URI, so send it along as an attachment.
+        icon = self.favicon(data["icon"])
+        if icon is not None:
+            embed.set_thumbnail(url="attachment://icon.png")
         else:
             embed.set_thumbnail(
                 url=(
@@ -195,7 +236,10 @@ class Info(commands.Cog):
                     "/602058959284863051/unknown.png"
                 )
             )
-        await ctx.send(embed=embed)
+        if snapshot is not None:
+            embed.set_footer(text=_("Last checked"))
+            embed.timestamp = datetime.fromtimestamp(snapshot["checked"], pytz.utc)
+        await ctx.send(embed=embed, file=icon)
 
     @cog_ext.cog_slash(
         name="server",
@@ -218,83 +262,63 @@ class Info(commands.Cog):
         await ctx.defer()
         await self.server(ctx, address, port)
 
-    # @commands.command()
-    async def serverpe(self, ctx, address, port: Optional[int] = None):
+    @commands.command()
+    async def serverpe(self, ctx, address: str, port: Optional[int] = None):
+        """Minecraft Bedrock Edition server info."""
         await ctx.channel.trigger_typing()
         server_ip, _port = self.get_server(address, port)
         port = _port if _port else port
-        params = (
-            {"server": address} if port is None else {"server": address, "port": port}
-        )
-        async with self.bot.http_session.get(
-            f"{get_settings().API_URL}/server/bedrock", params=params
-        ) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-            else:
+        key = f"serverpe_{server_ip}:{port}"
+        raw = await self.bot.redis.get(key)
+        if raw is not None:
+            data = json.loads(raw)
+        else:
+            try:
+                data = await self.bot.bedrock_pinger.ping(server_ip, port)
+            except ServerUnreachable:
                 data = None
+            await self.bot.redis.set(
+                key, json.dumps(data), expire=600 if data is not None else 60
+            )
         if data is None:
-            await ctx.send("server could not be reached.")
+            await ctx.send(_("server could not be reached."))
             return
-        embed = discord.Embed(title=f"Bedrock Server: {server_ip}", color=0x00FF00)
-        embed.add_field(name="Description", value=data["motd"]["clean"][0])
+        embed = discord.Embed(
+            title=_("Bedrock Server: {server_ip}").format(server_ip=server_ip),
+            color=0x00FF00,
+        )
+        embed.add_field(name=_("Description"), value=data["motd"]["clean"][0])
 
         embed.add_field(
             name="Players",
-            value=(
-                f"Online: `{data['players']['online']:,}` \n "
-                f"Maximum: `{data['players']['max']:,}`"
+            value=_("Online: `{online}` \n " "Maximum: `{maximum}`").format(
+                online=data["players"]["online"], maximum=data["players"]["max"]
             ),
         )
         embed.add_field(
-            name="Version",
-            value=(
-                f"Java Edition \n Running: `{data['version']}` \n"
-                f"Protocol: `{data['protocol']}`"
-            ),
+            name=_("Version"),
+            value=_(
+                "Bedrock Edition \n Running: `{version}` \n" "Protocol: `{protocol}`"
+            ).format(version=data["version"], protocol=data["protocol"]),
             inline=False,
         )
-        if data["icon"]:
-            url = f"{get_settings().API_URL}/server/javaicon?server={server_ip}"
-            if port is not None:
-                url += f"&port={port}"
-            embed.set_thumbnail(url=url)
-        else:
-            embed.set_thumbnail(
-                url=(
-                    "https://media.discordapp.net/attachments/493764139290984459"
-                    "/602058959284863051/unknown.png"
-                )
+        embed.set_thumbnail(
+            url=(
+                "https://media.discordapp.net/attachments/493764139290984459"
+                "/602058959284863051/unknown.png"
             )
+        )
         await ctx.send(embed=embed)
 
     @commands.command(aliases=["sales"])
     async def status(self, ctx) -> None:
         """Check the status of all the Mojang services."""
         await ctx.channel.trigger_typing()
-        async with self.bot.http_session.get(
-            f"{get_settings().API_URL}/mojang/check"
-        ) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-            else:
-                data = None
-        sales_mapping = {
-            "item_sold_minecraft": True,
-            "prepaid_card_redeemed_minecraft": True,
-            "item_sold_cobalt": False,
-            "item_sold_scrolls": False,
-        }
-        payload = {"metricKeys": [k for (k, v) in sales_mapping.items() if v]}
-
-        if await self.bot.redis.exists("status"):
-            sales_data = json.loads(await self.bot.redis.get("status"))
-        else:
-            url = "https://api.mojang.com/orders/statistics"
-            async with ctx.bot.http_session.post(url, json=payload) as resp:
-                if resp.status == 200:
-                    sales_data = await resp.json()
-            await self.bot.redis.set("status", json.dumps(sales_data))
+        snapshot = await self.bot.mojang_status.get_snapshot()
+        if snapshot is None:
+            await ctx.send(_("Mojang's service status is unavailable right now."))
+            return
+        data = snapshot["services"]
 
         services = ""
         for service in data:
@@ -307,13 +331,17 @@ class Info(commands.Cog):
                     ":heart: - {service}: **This service is offline.** \n"
                 ).format(service=service)
         embed = discord.Embed(title=_("Minecraft Service Status"), color=0x00FF00)
-        embed.add_field(
-            name="Minecraft Game Sales",
-            value=_("Total Sales: **{total}** Last 24 Hours: **{last}**").format(
-                total=sales_data["total"], last=sales_data["last24h"]
-            ),
-        )
+        sales = self.bot.sales_stats.latest()
+        if sales is not None:
+            embed.add_field(
+                name="Minecraft Game Sales",
+                value=_("Total Sales: **{total}** Last 24 Hours: **{last}**").format(
+                    total=f"{sales[1]:,}", last=f"{self.bot.sales_stats.delta():,}"
+                ),
+            )
         embed.add_field(name=_("Minecraft Services:"), value=services, inline=False)
+        embed.set_footer(text=_("Last checked"))
+        embed.timestamp = datetime.fromtimestamp(snapshot["checked"], pytz.utc)
 
         await ctx.send(embed=embed)
 
@@ -327,61 +355,47 @@ class Info(commands.Cog):
         """Get an article from the minecraft wiki."""
         await ctx.channel.trigger_typing()
 
-        def generate_payload(query: str) -> dict:
-            """Generate the payload for Gamepedia based on a query string."""
-            payload = {
-                "action": "query",
-                "titles": query.replace(" ", "_"),
-                "format": "json",
-                "formatversion": "2",  # Cleaner json results
-                "prop": "extracts",  # Include extract in returned results
-                "exintro": "1",  # Only return summary paragraph(s) before main content
-                "redirects": "1",  # Follow redirects
-                "explaintext": "1",  # Make sure it's plaintext (not HTML)
-            }
-            return payload
-
-        base_url = "https://minecraft.gamepedia.com/api.php"
         footer_icon = (
             "https://upload.wikimedia.org/wikipedia/commons/thumb/5/53"
             "/Wikimedia-logo.png/600px-Wikimedia-logo.png"
         )
 
-        payload = generate_payload(query)
-        async with self.bot.http_session.get(base_url, params=payload) as resp:
-            if resp.status == 200:
-                result = await resp.json()
-            else:
-                result = None
-
         try:
-            # Get the last page. Usually this is the only page.
-            page = result["query"]["pages"][-1]
-            title = page["title"]
-            description = page["extract"].strip().replace("\n", "\n\n")
-            url = f"https://minecraft.gamepedia.com/{title.replace(' ', '_')}"
-
-            if len(description) > 1500:
-                description = description[:1500].strip()
-                description += f"... [(read more)]({url})"
-
-            embed = discord.Embed(
-                title=title,
-                description=f"\u2063\n{description}\n\u2063",
-                color=self.bot.color,
-                url=url,
-            )
-            embed.set_footer(
-                text=_("Information provided by Wikimedia"), icon_url=footer_icon
-            )
-            await ctx.send(embed=embed)
+            page = await self.wiki.get_page(query)
+        except LookupError:
+            await ctx.reply(_("The Minecraft Wiki could not be reached."))
+            return
 
-        except KeyError:
-            await ctx.reply(
-                _("I'm sorry, I couldn't find \"{query}\" on Gamepedia").format(
-                    query=query
-                )
+        if page is None:
+            message = _("I'm sorry, I couldn't find \"{query}\" on Gamepedia").format(
+                query=query
             )
+            suggestions = self.wiki.suggest(query)
+            if suggestions:
+                message += "\n" + _("Did you mean: {titles}?").format(
+                    titles=", ".join(f"`{title}`" for title in suggestions)
+                )
+            await ctx.reply(message)
+            return
+
+        title = page["title"]
+        description = page["extract"].strip().replace("\n", "\n\n")
+        url = f"https://minecraft.gamepedia.com/{title.replace(' ', '_')}"
+
+        if len(description) > 1500:
+            description = description[:1500].strip()
+            description += f"... [(read more)]({url})"
+
+        embed = discord.Embed(
+            title=title,
+            description=f"\u2063\n{description}\n\u2063",
+            color=self.bot.color,
+            url=url,
+        )
+        embed.set_footer(
+            text=_("Information provided by Wikimedia"), icon_url=footer_icon
+        )
+        await ctx.send(embed=embed)
 
     @cog_ext.cog_slash(
         name="wiki",
@@ -465,75 +479,75 @@ class Info(commands.Cog):
     #     await ctx.send(embed=embed)
 
     @commands.command()
-    async def version(self, ctx, version=None):
+    async def version(self, ctx, version: Optional[str] = None) -> None:
+        """Get info on a Minecraft Java Edition version."""
         await ctx.channel.trigger_typing()
-        async with self.bot.http_session.get(
-            "https://launchermeta.mojang.com/mc/game/version_manifest.json"
-        ) as resp:
-            data = await resp.json()
-        last_release = data["versions"][0]
-        id2version = {}
-        versions = {}
-
-        for _version in reversed(data["versions"]):
-            id2version[_version["id"]] = _version
-            if "." in _version["id"]:
-                version_num = "".join(_version["id"].split(".")[:1])
-                if version_num in versions:
-                    versions[version_num] = versions[version_num].append(_version)
-                else:
-                    version[version_num] = [version]
-        embed = discord.Embed(
-            colour=self.bot.color,
-        )
+        index = await self.bot.version_manifest.get_index()
+        if index is None:
+            await ctx.send(_("Version information is unavailable right now."))
+            return
+        embed = discord.Embed(colour=self.bot.color)
         format = "%Y-%m-%dT%H:%M:%S%z"
+        icon_url = (
+            "https://www.minecraft.net/etc.clientlibs/minecraft"
+            "/clientlibs/main/resources/img/menu/menu-buy--reversed.gif"
+        )
         if version is not None:
-            if version not in id2version:
+            version_data = index.by_id.get(version)
+            if version_data is None:
                 await ctx.send(_("Version is invalid."))
-            version_data = id2version[version]
+                return
+            wiki = f"https://minecraft.gamepedia.com/Java_Edition_{version}"
             embed.set_author(
                 name=_("Minecraft Java Edition {version}").format(version=version),
-                url=_("https://minecraft.gamepedia.com/Java_Edition_{version}").format(
-                    version=version
+                url=wiki,
+                icon_url=icon_url,
+            )
+            embed.add_field(
+                name=version,
+                value=_(
+                    "Type: `{type}`\nRelease: `{released}`\n"
+                    "[Package URL]({package_url})\n[Minecraft Wiki]({wiki})"
+                ).format(
+                    type=version_data["type"],
+                    released=datetime.strptime(version_data["releaseTime"], format),
+                    package_url=version_data["url"],
+                    wiki=wiki,
                 ),
-                icon_url=(
-                "https://www.minecraft.net/etc.clientlibs/minecraft"
-                "/clientlibs/main/resources/img/menu/menu-buy--reversed.gif"
-            ),
             )
-            embed.add_field(name=version, value=_(
-                "Type: `{type}`\nRelease: `{released}`\nPackage URL: `{package_url}`\nMinecraft Wiki: {version}"
-            ).format(type=version_data["type"], released = datetime.strptime(version_data["releaseTime"], format), package_url=version_data["url"]))
         else:
             embed.set_author(
-                name=_("Minecraft Java Edition Versions"),
-                icon_url=(
-                "https://www.minecraft.net/etc.clientlibs/minecraft"
-                "/clientlibs/main/resources/img/menu/menu-buy--reversed.gif"
-            )),
-            for _version in version:
-                embed.add_filed(name=_version[0].id, value=_(
-                    "Releases: `{releases}`"
-                    "**Latest Version**"
-                    "ID: `{id}`"
-                    "Released: `{}`"
-                ).format(releases=len(_version)-1, id=_version[-1].id, released=datetime.strptime(_version[-1]["releaseTime"], format)))
-        return embed
+                name=_("Minecraft Java Edition Versions"), icon_url=icon_url
+            )
+            # Newest first, within the limit of 25 fields per embed.
+            for major in list(index.by_major)[::-1][:25]:
+                versions = index.by_major[major]
+                embed.add_field(
+                    name=major,
+                    value=_(
+                        "Versions: `{releases}`\nLatest: `{id}`\nReleased: `{released}`"
+                    ).format(
+                        releases=len(versions),
+                        id=versions[-1]["id"],
+                        released=datetime.strptime(
+                            versions[-1]["releaseTime"], format
+                        ).date(),
+                    ),
+                )
+        await ctx.send(embed=embed)
 
     @commands.command()
     async def news(self, ctx):
         await ctx.channel.trigger_typing()
-        async with self.bot.http_session.get("https://www.minecraft.net/en-us/feeds/community-content/rss") as resp:
-            text = await resp.text()
-        data = feedparser.parse(text, "lxml")["entries"][:12]
+        entries = await self.bot.news_feed.latest(12)
         embed=discord.Embed(colour=self.bot.color)
-        for post in data:
-            time = datetime.fromtimestamp(mktime(post["published_parsed"]), pytz.utc)
+        for entry in entries:
+            post = entry.data
             format = "%d %m %Y"
-            time = datetime.strftime(time, format)
+            time = datetime.strftime(entry.published, format)
             embed.add_field(name=post["title"],value=(
                 "Category: `{category}`"
                 "Published: `{pub}`"
                 "[Article Link]({link})"
-            ).format(category=data["primarytag"],pub=time,link=post["id"]))
+            ).format(category=post.get("primarytag"),pub=time,link=post["id"]))
         await ctx.send(embed=embed)
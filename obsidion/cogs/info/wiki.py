@@ -0,0 +1,240 @@
+"""Cached Minecraft Wiki lookups."""
+import asyncio
+import json
+import logging
+import re
+from collections import defaultdict
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from discord.ext import tasks
+from obsidion.core.lease import Lease
+from obsidion.core.settings_cache import LocalCache
+from obsidion.core.settings_cache import MISSING
+
+log = logging.getLogger(__name__)
+
+WIKI_API = "https://minecraft.gamepedia.com/api.php"
+
+_WHITESPACE = re.compile(r"[\s_]+")
+
+
+def normalise_title(title: str) -> str:
+    """Key used for a title, ignoring case, underscores and extra spaces."""
+    return _WHITESPACE.sub(" ", title).strip().casefold()
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleIndex:
+    """Trigram index of every article title and redirect on the wiki."""
+
+    def __init__(self, titles: Dict[str, str]) -> None:
+        # Normalised title or redirect -> canonical article title.
+        self.titles = {
+            normalise_title(name): target for name, target in titles.items()
+        }
+        self._grams: Dict[str, Set[str]] = defaultdict(set)
+        self._sizes: Dict[str, int] = {}
+        for name in self.titles:
+            grams = trigrams(name)
+            self._sizes[name] = len(grams)
+            for gram in grams:
+                self._grams[gram].add(name)
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def get(self, title: str) -> Optional[str]:
+        """Canonical title for an exact title or redirect."""
+        return self.titles.get(normalise_title(title))
+
+    def search(
+        self, query: str, limit: int = 3, threshold: float = 0.3
+    ) -> List[Tuple[float, str]]:
+        """Titles closest to `query` as ``(score, title)``, best first."""
+        query_grams = trigrams(normalise_title(query))
+        shared: Dict[str, int] = defaultdict(int)
+        for gram in query_grams:
+            for name in self._grams.get(gram, ()):
+                shared[name] += 1
+
+        best: Dict[str, float] = {}
+        for name, count in shared.items():
+            # Jaccard similarity of the two trigram sets.
+            score = count / (len(query_grams) + self._sizes[name] - count)
+            target = self.titles[name]
+            if score >= threshold and score > best.get(target, 0.0):
+                best[target] = score
+        ranked = sorted(((score, title) for title, score in best.items()), reverse=True)
+        return ranked[:limit]
+
+
+class WikiClient:
+    """Minecraft Wiki extracts behind an in-process LRU and Redis.
+
+    Titles are resolved against a local `TitleIndex` first, so redirects
+    and small misspellings map to the right article. Anything the index does
+    not know, such as an article written since it was built, is looked up
+    on the wiki as typed.
+    """
+
+    def __init__(
+        self,
+        bot,
+        expire: int = 604800,
+        negative_expire: int = 3600,
+        autocorrect: float = 0.6,
+    ) -> None:
+        self._bot = bot
+        self.expire = expire
+        self.negative_expire = negative_expire
+        self.autocorrect = autocorrect
+        self.local = LocalCache(maxsize=2000, ttl=3600)
+        self.index: Optional[TitleIndex] = None
+        # Only one process crawls the wiki, the others wait for its titles.
+        self.crawl_lease = Lease(bot, "wiki_titles_crawl", ttl=600)
+
+    async def _all_titles(self) -> Dict[str, str]:
+        titles: Dict[str, str] = {}
+        params = {
+            "action": "query",
+            "format": "json",
+            "formatversion": "2",
+            "list": "allpages",
+            "apnamespace": "0",
+            "apfilterredir": "nonredirects",
+            "aplimit": "max",
+        }
+        while True:
+            data = await self._bot.http_client.get_json(WIKI_API, params=params)
+            if data is None:
+                raise LookupError("Could not list wiki articles")
+            for page in data["query"]["allpages"]:
+                titles[page["title"]] = page["title"]
+            if "continue" not in data:
+                break
+            params.update(data["continue"])
+
+        params = {
+            "action": "query",
+            "format": "json",
+            "formatversion": "2",
+            "generator": "allpages",
+            "gapnamespace": "0",
+            "gapfilterredir": "redirects",
+            "gaplimit": "max",
+            "redirects": "1",
+        }
+        while True:
+            data = await self._bot.http_client.get_json(WIKI_API, params=params)
+            if data is None:
+                raise LookupError("Could not list wiki redirects")
+            for redirect in data.get("query", {}).get("redirects", []):
+                titles.setdefault(redirect["from"], redirect["to"])
+            if "continue" not in data:
+                break
+            params.update(data["continue"])
+        return titles
+
+    async def _shared_titles(self) -> Dict[str, str]:
+        """Titles shared in Redis, crawling the wiki if no process has yet."""
+        while True:
+            raw = await self._bot.redis.get("wiki_titles")
+            if raw is not None:
+                return json.loads(raw)
+            if await self.crawl_lease.acquire():
+                break
+            await asyncio.sleep(30)
+        titles = await self._all_titles()
+        await self._bot.redis.set("wiki_titles", json.dumps(titles), expire=86400)
+        return titles
+
+    @tasks.loop(hours=24)
+    async def refresh_index(self) -> None:
+        """Rebuild the title index, sharing it between processes via Redis."""
+        # An uncaught error would stop the loop for good.
+        try:
+            titles = await self._shared_titles()
+        except LookupError as e:
+            log.warning("%s", e)
+            return
+        except Exception:
+            log.exception("Could not refresh the wiki title index")
+            return
+        self.index = TitleIndex(titles)
+        log.info("Indexed %s wiki titles", len(self.index))
+
+    def resolve(self, query: str) -> str:
+        """Title to look up for `query`.
+
+        Exact titles, redirects and close misspellings resolve through the
+        index, anything else is passed on as typed.
+        """
+        if self.index is None:
+            return query
+        title = self.index.get(query)
+        if title is not None:
+            return title
+        matches = self.index.search(query, limit=1, threshold=self.autocorrect)
+        return matches[0][1] if matches else query
+
+    def suggest(self, query: str, limit: int = 3) -> List[str]:
+        """Titles close to `query`, for a "did you mean" reply."""
+        if self.index is None:
+            return []
+        return [title for _, title in self.index.search(query, limit=limit)]
+
+    async def _fetch(self, title: str) -> Optional[Dict[str, Any]]:
+        params = {
+            "action": "query",
+            "titles": title.replace(" ", "_"),
+            "format": "json",
+            "formatversion": "2",  # Cleaner json results
+            "prop": "extracts",  # Include extract in returned results
+            "exintro": "1",  # Only return summary paragraph(s) before main content
+            "redirects": "1",  # Follow redirects
+            "explaintext": "1",  # Make sure it's plaintext (not HTML)
+        }
+        result = await self._bot.http_client.get_json(WIKI_API, params=params)
+        if result is None:
+            raise LookupError("The wiki could not be reached")
+        # Get the last page. Usually this is the only page.
+        page = result["query"]["pages"][-1]
+        if "missing" in page or "extract" not in page:
+            return None
+        return {"title": page["title"], "extract": page["extract"]}
+
+    async def get_page(self, query: str) -> Optional[Dict[str, Any]]:
+        """The title and introduction of the article `query` refers to.
+
+        Raises
+        ------
+        LookupError
+            If the article is not cached and the wiki could not be reached.
+        """
+        title = self.resolve(query)
+        key = f"wiki_{normalise_title(title)}"
+
+        page = self.local.get(key)
+        if page is not MISSING:
+            return page
+        raw = await self._bot.redis.get(key)
+        if raw is not None:
+            page = json.loads(raw)
+        else:
+            page = await self._fetch(title)
+            await self._bot.redis.set(
+                key,
+                json.dumps(page),
+                expire=self.expire if page is not None else self.negative_expire,
+            )
+        self.local.set(key, page)
+        return page
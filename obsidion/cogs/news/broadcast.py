@@ -0,0 +1,85 @@
+"""Share autopost work between the bot's processes."""
+import asyncio
+import json
+import logging
+from typing import AsyncIterator
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+import aioredis
+import discord
+from obsidion.core import get_settings
+
+from .sources import Post
+
+log = logging.getLogger(__name__)
+
+LEADER_KEY = "news:leader"
+POSTS_STREAM = "news:posts"
+
+
+async def publish(bot, category: str, post: Post, max_len: int = 1000) -> None:
+    """Broadcast a post to every process through the posts stream."""
+    await bot.redis.xadd(
+        POSTS_STREAM,
+        {
+            "category": category,
+            "item_id": post.item_id,
+            "published": post.published.isoformat(),
+            "embed": json.dumps(post.embed.to_dict()),
+        },
+        max_len=max_len,
+    )
+
+
+async def _start_id(bot, cursor_key: str) -> str:
+    latest = await bot.redis.get(cursor_key, encoding="utf-8")
+    if latest is None:
+        # Pin "now" to a real id, as "$" would skip anything published
+        # between one read timing out or failing and the next.
+        tip = await bot.redis.xrevrange(POSTS_STREAM, count=1)
+        latest = tip[0][0].decode() if tip else "0-0"
+    return latest
+
+
+def _decode(fields: Dict[bytes, bytes]) -> Tuple[str, str, discord.Embed]:
+    embed = discord.Embed.from_dict(json.loads(fields[b"embed"].decode()))
+    return fields[b"category"].decode(), fields[b"item_id"].decode(), embed
+
+
+async def subscribe(
+    bot, cursor_key: str
+) -> AsyncIterator[Tuple[str, str, str, discord.Embed]]:
+    """Yield ``(message_id, category, item_id, embed)`` for broadcast posts.
+
+    Reading starts after the message id stored at `cursor_key`, which the
+    consumer should update once it has handled a post, or from now if there
+    is none. Entries that cannot be decoded are logged and skipped. Blocking
+    reads need a dedicated connection, so this does not use the bot pool.
+    """
+    latest: Optional[str] = None
+    while True:
+        try:
+            if latest is None:
+                latest = await _start_id(bot, cursor_key)
+            conn = await aioredis.create_redis(str(get_settings().REDIS))
+            try:
+                while True:
+                    entries = await conn.xread(
+                        [POSTS_STREAM], timeout=10000, latest_ids=[latest]
+                    )
+                    for _, message_id, fields in entries:
+                        latest = message_id.decode()
+                        try:
+                            category, item_id, embed = _decode(fields)
+                        except Exception:
+                            log.exception("Skipping malformed post %s", latest)
+                            continue
+                        yield latest, category, item_id, embed
+            finally:
+                conn.close()
+                await conn.wait_closed()
+        except (aioredis.RedisError, OSError):
+            log.warning("Lost the news stream, reconnecting")
+        await asyncio.sleep(5)
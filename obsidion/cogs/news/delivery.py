@@ -0,0 +1,159 @@
+"""Fan out autoposts to many channels at once."""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Iterable
+from typing import Optional
+
+import discord
+from obsidion.core.http import TokenBucket
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class DeliveryStats:
+    """Outcome of delivering one post."""
+
+    sent: int = 0
+    failed: int = 0
+    skipped: int = 0
+    already_sent: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Messages sent per second."""
+        return self.sent / self.elapsed if self.elapsed else 0.0
+
+
+class Delivery:
+    """Send an embed to many channels with bounded concurrency.
+
+    discord.py already waits out per-route and global rate limits when it
+    is told about them. The bucket here keeps us under the global limit of
+    50 requests a second in the first place, and the semaphore stops one
+    large post from queueing thousands of requests at once.
+
+    The global limit is shared by every process using the token, but the
+    bucket only sees this one. `rate` is the budget for the whole bot, and
+    each process takes the share of it matching the share of shards it
+    runs. A process that cannot tell its shards apart uses all of it.
+    """
+
+    def __init__(
+        self,
+        bot,
+        concurrency: int = 20,
+        rate: float = 40.0,
+        log_expire: int = 604800,
+    ) -> None:
+        self._bot = bot
+        self.concurrency = concurrency
+        self.rate = rate
+        self.log_expire = log_expire
+        self.bucket = TokenBucket(rate, rate)
+        self.last_stats: Optional[DeliveryStats] = None
+
+    def _fit_bucket(self) -> None:
+        """Scale the bucket to this process's share of the shards."""
+        shard_ids, shard_count = self._bot.shard_ids, self._bot.shard_count
+        share = len(shard_ids) / shard_count if shard_ids and shard_count else 1
+        rate = max(self.rate * share, 1.0)
+        if rate != self.bucket.rate:
+            self.bucket.rate = self.bucket.capacity = rate
+
+    def _resolve(self, channel_id: int) -> Optional[discord.TextChannel]:
+        channel = self._bot.get_channel(channel_id)
+        if not isinstance(channel, discord.TextChannel):
+            return None
+        permissions = channel.permissions_for(channel.guild.me)
+        if not (permissions.send_messages and permissions.embed_links):
+            return None
+        return channel
+
+    async def _send(
+        self,
+        semaphore: asyncio.Semaphore,
+        channel: discord.TextChannel,
+        embed: discord.Embed,
+        publish: bool,
+        stats: DeliveryStats,
+        log_key: Optional[str],
+    ) -> None:
+        async with semaphore:
+            try:
+                await self.bucket.acquire()
+                message = await channel.send(embed=embed)
+                if publish and channel.is_news():
+                    await self.bucket.acquire()
+                    await message.publish()
+            except discord.HTTPException as e:
+                stats.failed += 1
+                log.debug("Could not post to %s: %s", channel.id, e)
+            else:
+                stats.sent += 1
+                if log_key is not None:
+                    pipe = self._bot.redis.pipeline()
+                    pipe.sadd(log_key, channel.id)
+                    pipe.expire(log_key, self.log_expire)
+                    await pipe.execute()
+
+    async def deliver(
+        self,
+        channel_ids: Iterable[int],
+        embed: discord.Embed,
+        publish: bool = True,
+        item_id: Optional[str] = None,
+    ) -> DeliveryStats:
+        """Post `embed` to every channel this bot can still post in.
+
+        Channels that are gone, or where the bot lacks permissions, are
+        skipped rather than tried. Announcement channels are published to
+        followers when `publish` is set.
+
+        With an `item_id`, every successful send is recorded in a delivery
+        log and channels already in it are left out, so delivering the same
+        item again only reaches the channels that were missed.
+        """
+        stats = DeliveryStats()
+        start = time.monotonic()
+        channel_ids = set(channel_ids)
+        log_key = None
+        if item_id is not None:
+            log_key = f"news:delivered:{item_id}"
+            delivered = await self._bot.redis.smembers(log_key, encoding="utf-8")
+            done = channel_ids & {int(channel_id) for channel_id in delivered}
+            stats.already_sent = len(done)
+            channel_ids -= done
+
+        channels = []
+        for channel_id in channel_ids:
+            channel = self._resolve(channel_id)
+            if channel is None:
+                stats.skipped += 1
+            else:
+                channels.append(channel)
+
+        self._fit_bucket()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(
+            *(
+                self._send(semaphore, channel, embed, publish, stats, log_key)
+                for channel in channels
+            )
+        )
+        stats.elapsed = time.monotonic() - start
+        self.last_stats = stats
+        log.info(
+            "Delivered to %s channels in %.1fs (%.1f/s), %s failed, %s skipped, "
+            "%s already sent",
+            stats.sent,
+            stats.elapsed,
+            stats.throughput,
+            stats.failed,
+            stats.skipped,
+            stats.already_sent,
+        )
+        return stats
@@ -1,207 +1,151 @@
 """Images cog."""
-import json
+import asyncio
 import logging
 from datetime import datetime
-from time import mktime
-from typing import Union
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
 
 import discord
-import feedparser
 import pytz
-from bs4 import BeautifulSoup
 from discord.ext import commands
 from discord.ext import tasks
-from obsidion.core import get_settings
 from obsidion.core.i18n import cog_i18n
 from obsidion.core.i18n import Translator
+from obsidion.core.lease import Lease
+from .broadcast import LEADER_KEY
+from .broadcast import publish
+from .broadcast import subscribe
+from .delivery import Delivery
+from .sources import Articles
+from .sources import JavaSnapshots
+from .sources import Source
 
 log = logging.getLogger(__name__)
 
 _ = Translator("News", __file__)
 
-Minecraft_News_RSS = "https://www.minecraft.net/en-us/feeds/community-content/rss"
-
 
 @cog_i18n(_)
 class News(commands.Cog):
     def __init__(self, bot) -> None:
         """Init."""
         self.bot = bot
-        self.last_media_data = datetime.now(pytz.utc)
-        self.last_java_version_data = datetime.now(pytz.utc)
-        self.mojang_service = {}
+        self.delivery = Delivery(bot)
+        self.sources: List[Source] = [JavaSnapshots(bot), Articles(bot)]
+        # Held a while past the loop interval so the leader keeps it between
+        # ticks, and another process takes over if the leader goes away.
+        self.lease = Lease(bot, LEADER_KEY, ttl=15 * 60)
         self.autopost.start()
+        self._restart: Optional[asyncio.TimerHandle] = None
+        self._start_receiver()
 
-    async def get_status(self) -> Union[discord.Embed, None]:
-        async with self.bot.http_session.get(
-            f"{get_settings().API_URL}/mojang/check"
-        ) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-            else:
-                data = None
-
-        embed = discord.Embed()
-        embed.set_author(name="Mojang service downtime")
-        em = 0
-        for service in data:
-            if data[service] != "green" and service not in self.mojang_service:
-                em = 1
-                embed.add_field(name=_("Downtime"), value=service)
-            elif data[service] == "green" and service in self.mojang_service:
-                em = 1
-                embed.add_field(name=_("Back Online"), value=service)
-        if em == 0:
-            return None
-        return embed
-
-    async def get_media(self) -> Union[discord.Embed, None]:
-        """Get rss media."""
-        async with self.bot.http_session.get(Minecraft_News_RSS) as resp:
-            text = await resp.text()
-        data = feedparser.parse(text, "lxml")
-
-        # select the most recent post
-        latest_post = data["entries"][0]
-
-        # run checks to see wether it should be posted
-
-        time = datetime.fromtimestamp(mktime(latest_post["published_parsed"]), pytz.utc)
-
-        if time < self.last_media_data:
-            return None
-
-        async with self.bot.http_session.get(latest_post["id"]) as resp:
-            text = await resp.text()
-        soup = BeautifulSoup(text, "lxml")
-        author_image = f"https://www.minecraft.net{soup.find('img', id='author-avatar').get('src')}"
-        author = soup.find("dl", class_="attribution__details").dd.string
-        text = soup.find("div", class_="end-with-block").p.text
-
-        embed = discord.Embed(
-            title=soup.find("h1").string,
-            description=text,
-            colour=self.bot.color,
-            url=f"https://minecraft.net{latest_post['imageurl']}",
-            thumbnail=author_image,
-        )
-
-        # add categories
-        embed.set_image(url=f"https://minecraft.net{latest_post['imageurl']}")
-        embed.set_thumbnail(url=author_image)
-        embed.add_field(name=_("Category"), value=latest_post["primarytag"])
-        embed.add_field(name=_("Author"), value=author)
-        embed.add_field(
-            name=_("Publish Date"),
-            value=" ".join(latest_post["published"].split(" ")[:4]),
-        )
-
-        # create footer
-        embed.set_footer(text=_("Article Published"))
-        embed.timestamp = time
-        self.last_media_data = time
-
-        # create title
-        embed.set_author(
-            name=_("New Article on Minecraft.net"),
-            url=latest_post["id"],
-            icon_url=(
-                "https://www.minecraft.net/etc.clientlibs/minecraft"
-                "/clientlibs/main/resources/img/menu/menu-buy--reversed.gif"
-            ),
-        )
-
-        return embed
+    def _start_receiver(self) -> None:
+        self._receiver = asyncio.create_task(self.receive_posts())
+        self._receiver.add_done_callback(self._receiver_done)
 
-    async def get_java_releases(self) -> Union[discord.Embed, None]:
-        async with self.bot.http_session.get(
-            "https://launchermeta.mojang.com/mc/game/version_manifest.json"
-        ) as resp:
-            data = await resp.json()
-        last_release = data["versions"][0]
-
-        format = "%Y-%m-%dT%H:%M:%S%z"
-        time = datetime.strptime(last_release["time"], format)
-        if time < self.last_java_version_data:
-            return None
-
-        if last_release["type"] != "snapshot":
-            return None
-
-        embed = discord.Embed(
-            colour=self.bot.color,
-        )
-
-        embed.add_field(name=_("Name"), value=last_release["id"])
-        embed.add_field(
-            name=_("Package URL"),
-            value=_("[Package URL]({url})").format(url=last_release["url"]),
-        )
-        embed.add_field(
-            name=_("Minecraft Wiki"),
-            value=_(
-                "[Minecraft Wiki](https://minecraft.gamepedia.com/Java_Edition_{id})"
-            ).format(id=last_release["id"]),
-        )
-
-        embed.set_footer(text=_("Article Published"))
-        embed.timestamp = time
-        self.last_java_version_data = time
-        # create title
-        embed.set_author(
-            name=_("New Minecraft Java Edition Snapshot"),
-            url=f"https://minecraft.gamepedia.com/Java_Edition_{last_release['id']}",
-            icon_url=(
-                "https://www.minecraft.net/etc.clientlibs/minecraft"
-                "/clientlibs/main/resources/img/menu/menu-buy--reversed.gif"
-            ),
-        )
-        return embed
+    def _receiver_done(self, task: asyncio.Task) -> None:
+        if task.cancelled():
+            return
+        # Without a receiver this process would never post broadcasts again.
+        log.error("News receiver stopped, restarting", exc_info=task.exception())
+        self._restart = asyncio.get_event_loop().call_later(5, self._start_receiver)
 
     @tasks.loop(minutes=10)
     async def autopost(self) -> None:
-        posts = await self.bot.db.fetch("SELECT news FROM guild WHERE news IS NOT NULL")
-        channels = {}
-        for server in posts:
-            n = json.loads(server["news"])
-            for key in n.keys():
-                if n[key] is not None:
-                    if key in channels:
-
-                        channels[key] = n[key]
-                    else:
-                        channels[key] = [n[key]]
-
-        release_embed = await self.get_java_releases()
-        article_embed = await self.get_media()
-        status_embed = await self.get_status()
-        if release_embed is not None and "release" in channels:
-            # send embed
-            for _channel in channels["release"]:
-                channel = self.bot.get_channel(_channel)
-                message = await channel.send(embed=release_embed)
-                try:
-                    await message.publish()
-                except discord.errors.Forbidden:
-                    pass
-        if article_embed is not None and "article" in channels:
-            for _channel in channels["article"]:
-                channel = self.bot.get_channel(_channel)
-                message = await channel.send(embed=article_embed)
+        """Poll every source at once, if this process is the leader.
+
+        New posts are broadcast to every process, which deliver them to the
+        channels on their own shards.
+        """
+        # An uncaught error would stop the loop for good.
+        try:
+            if not await self.lease.acquire():
+                return
+            await asyncio.gather(*(self.post_from(source) for source in self.sources))
+        except Exception:
+            log.exception("Could not run autopost")
+
+    async def post_from(self, source: Source) -> None:
+        posts = await source.run()
+        for post in posts:
+            await publish(self.bot, source.category, post)
+        await source.advance(posts)
+
+    async def receive_posts(self) -> None:
+        """Deliver broadcast posts to the subscribed channels this process owns."""
+        # Channels can only be told apart once this process's shards are up.
+        await self.bot.wait_until_ready()
+        # Shards map to the same process across restarts, unlike PROCESS_ID.
+        shards = ",".join(map(str, sorted(self.bot.shard_ids or []))) or "all"
+        cursor_key = f"news:cursor:{shards}"
+        async for message_id, category, item_id, embed in subscribe(
+            self.bot, cursor_key
+        ):
+            # The delivery log makes retries safe. A post that still fails
+            # leaves the cursor behind it until a later post gets through.
+            for attempt in range(3):
+                if attempt:
+                    await asyncio.sleep(5 * 2 ** (attempt - 1))
                 try:
-                    await message.publish()
-                except discord.errors.Forbidden:
-                    pass
-
-        if status_embed is not None and "status" in channels:
-            for _channel in channels["status"]:
-                channel = self.bot.get_channel(_channel)
-                message = await channel.send(embed=status_embed)
-                try:
-                    await message.publish()
-                except discord.errors.Forbidden:
-                    pass
+                    channels = await self.bot._guild_cache.news_subscribers(category)
+                    owned = [c for c in channels if self.bot.get_channel(c) is not None]
+                    await self.delivery.deliver(owned, embed, item_id=item_id)
+                    await self.bot.redis.set(cursor_key, message_id)
+                except Exception:
+                    log.exception("Could not deliver %s", item_id)
+                else:
+                    break
+
+    @commands.Cog.listener()
+    async def on_mojang_status_change(self, changes: List[Dict[str, Any]]) -> None:
+        """Post Mojang service outages and recoveries."""
+        embed = discord.Embed(colour=self.bot.color)
+        embed.set_author(name=_("Mojang service downtime"))
+        for change in changes:
+            if change["new"] == "green":
+                embed.add_field(name=_("Back Online"), value=change["service"])
+            else:
+                embed.add_field(name=_("Downtime"), value=change["service"])
+        embed.timestamp = datetime.fromtimestamp(changes[0]["time"], pytz.utc)
+
+        guilds = self.bot._guild_cache
+        # Older setups stored outages under "status".
+        channels = await guilds.news_subscribers("outage")
+        channels |= await guilds.news_subscribers("status")
+        await self.delivery.deliver(channels, embed)
+
+    @commands.Cog.listener()
+    async def on_server_status_change(
+        self, address: str, guild_ids: List[int], online: bool
+    ) -> None:
+        """Tell guilds when their linked server goes down or comes back."""
+        if online:
+            embed = discord.Embed(colour=self.bot.color)
+            embed.set_author(name=_("Server Back Online"))
+        else:
+            embed = discord.Embed(colour=discord.Colour.red())
+            embed.set_author(name=_("Server Down"))
+        embed.description = _("`{address}` is now {state}.").format(
+            address=address,
+            state=_("online") if online else _("offline"),
+        )
+        embed.timestamp = datetime.now(pytz.utc)
+        channels = []
+        for guild_id in guild_ids:
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
+                continue
+            news = await self.bot._guild_cache.get_news(guild)
+            channel = (news or {}).get("server")
+            if channel is not None:
+                channels.append(channel)
+        await self.delivery.deliver(channels, embed, publish=False)
 
     def cog_unload(self) -> None:
         """Stop news posting tasks on cog unload."""
         self.autopost.cancel()
+        self._receiver.cancel()
+        if self._restart is not None:
+            self._restart.cancel()
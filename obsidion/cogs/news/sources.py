@@ -0,0 +1,214 @@
+"""Sources of news for autopost."""
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List
+from typing import Optional
+
+import discord
+import pytz
+from bs4 import BeautifulSoup
+from obsidion.core.i18n import Translator
+
+log = logging.getLogger(__name__)
+
+_ = Translator("News", __file__)
+
+# Redis hash of each source's watermark, as an ISO 8601 timestamp.
+WATERMARKS_KEY = "news:watermarks"
+
+MINECRAFT_ICON = (
+    "https://www.minecraft.net/etc.clientlibs/minecraft"
+    "/clientlibs/main/resources/img/menu/menu-buy--reversed.gif"
+)
+
+
+@dataclass(frozen=True)
+class Post:
+    """A single item to announce."""
+
+    item_id: str
+    published: datetime
+    embed: discord.Embed
+
+
+class Source:
+    """A news source polled by autopost.
+
+    Subclasses set `name` and `category`, the autopost category whose
+    subscribers receive the posts, and implement `fetch`. Every source runs
+    with its own timeout and retries, so a slow or failing one does not hold
+    up the others. Watermarks are kept in Redis, so whichever process runs
+    the source next, after a restart or a change of leader, carries on
+    from the same point.
+    """
+
+    name: str
+    category: str
+    timeout: float = 30.0
+    retries: int = 2
+    backoff: float = 5.0
+
+    def __init__(self, bot) -> None:
+        self.bot = bot
+        self.watermark: Optional[datetime] = None
+        self.last_success: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+
+    async def fetch(self, since: datetime) -> List[Post]:
+        """Items published after `since`, oldest first."""
+        raise NotImplementedError
+
+    async def load_watermark(self) -> datetime:
+        """The stored watermark, starting from now for a new source."""
+        raw = await self.bot.redis.hget(WATERMARKS_KEY, self.name, encoding="utf-8")
+        if raw is not None:
+            return datetime.fromisoformat(raw)
+        watermark = datetime.now(pytz.utc)
+        await self.bot.redis.hsetnx(WATERMARKS_KEY, self.name, watermark.isoformat())
+        return watermark
+
+    async def advance(self, posts: List[Post]) -> None:
+        """Move the watermark past posts that have been handed off."""
+        if not posts:
+            return
+        self.watermark = max(post.published for post in posts)
+        await self.bot.redis.hset(WATERMARKS_KEY, self.name, self.watermark.isoformat())
+
+    async def run(self) -> List[Post]:
+        """Fetch posts newer than the stored watermark.
+
+        The watermark only moves once the caller passes the posts to
+        `advance`. Errors are logged rather than raised, and an empty list
+        returned.
+        """
+        for attempt in range(self.retries + 1):
+            if attempt:
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+            try:
+                # Another process may have led since this one last ran it.
+                self.watermark = await self.load_watermark()
+                posts = await asyncio.wait_for(self.fetch(self.watermark), self.timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                log.warning("News source %s failed: %s", self.name, self.last_error)
+                continue
+            self.last_success = datetime.now(pytz.utc)
+            self.last_error = None
+            return posts
+        return []
+
+
+class JavaSnapshots(Source):
+    """New Java Edition snapshots from the version manifest."""
+
+    name = "java_snapshots"
+    category = "release"
+
+    async def fetch(self, since: datetime) -> List[Post]:
+        index = await self.bot.version_manifest.refresh()
+        if index is None:
+            raise LookupError("The version manifest is unavailable")
+
+        format = "%Y-%m-%dT%H:%M:%S%z"
+        posts = []
+        for version in index.versions:
+            time = datetime.strptime(version["time"], format)
+            if time <= since:
+                break
+            if version["type"] == "snapshot":
+                posts.append(Post(f"java:{version['id']}", time, self.embed(version)))
+        return posts[::-1]
+
+    def embed(self, version) -> discord.Embed:
+        embed = discord.Embed(
+            colour=self.bot.color,
+        )
+
+        embed.add_field(name=_("Name"), value=version["id"])
+        embed.add_field(
+            name=_("Package URL"),
+            value=_("[Package URL]({url})").format(url=version["url"]),
+        )
+        embed.add_field(
+            name=_("Minecraft Wiki"),
+            value=_(
+                "[Minecraft Wiki](https://minecraft.gamepedia.com/Java_Edition_{id})"
+            ).format(id=version["id"]),
+        )
+
+        embed.set_footer(text=_("Article Published"))
+        embed.timestamp = datetime.strptime(version["time"], "%Y-%m-%dT%H:%M:%S%z")
+        # create title
+        embed.set_author(
+            name=_("New Minecraft Java Edition Snapshot"),
+            url=f"https://minecraft.gamepedia.com/Java_Edition_{version['id']}",
+            icon_url=MINECRAFT_ICON,
+        )
+        return embed
+
+
+class Articles(Source):
+    """New articles from the minecraft.net RSS feed."""
+
+    name = "articles"
+    category = "article"
+
+    # Limits how many articles a single run posts after a long outage.
+    max_posts = 5
+
+    async def fetch(self, since: datetime) -> List[Post]:
+        await self.bot.news_feed.refresh(force=True)
+        entries = await self.bot.news_feed.entries_since(since)
+        posts = []
+        for entry in reversed(entries[: self.max_posts]):
+            text = await self.bot.http_client.get_text(entry.guid)
+            if text is None:
+                raise LookupError(f"Could not fetch {entry.guid}")
+            # Parsing a full article page is slow enough to block the loop.
+            embed = await asyncio.get_running_loop().run_in_executor(
+                None, self.embed, entry.data, entry.published, text
+            )
+            posts.append(Post(f"article:{entry.guid}", entry.published, embed))
+        return posts
+
+    def embed(self, latest_post, time: datetime, text: str) -> discord.Embed:
+        soup = BeautifulSoup(text, "lxml")
+        author_image = (
+            "https://www.minecraft.net"
+            f"{soup.find('img', id='author-avatar').get('src')}"
+        )
+        author = soup.find("dl", class_="attribution__details").dd.string
+        text = soup.find("div", class_="end-with-block").p.text
+
+        embed = discord.Embed(
+            title=soup.find("h1").string,
+            description=text,
+            colour=self.bot.color,
+            url=f"https://minecraft.net{latest_post['imageurl']}",
+        )
+
+        # add categories
+        embed.set_image(url=f"https://minecraft.net{latest_post['imageurl']}")
+        embed.set_thumbnail(url=author_image)
+        embed.add_field(name=_("Category"), value=latest_post["primarytag"])
+        embed.add_field(name=_("Author"), value=author)
+        embed.add_field(
+            name=_("Publish Date"),
+            value=" ".join(latest_post["published"].split(" ")[:4]),
+        )
+
+        # create footer
+        embed.set_footer(text=_("Article Published"))
+        embed.timestamp = time
+
+        # create title
+        embed.set_author(
+            name=_("New Article on Minecraft.net"),
+            url=latest_post["id"],
+            icon_url=MINECRAFT_ICON,
+        )
+        return embed
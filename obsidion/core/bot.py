@@ -1,8 +1,12 @@
 """Main bot file."""
-import json
+import asyncio
+import logging
 import socket
 import sys
 from enum import IntEnum
+from typing import Any
+from typing import Dict
+from typing import List
 from typing import Optional
 
 import aiohttp
@@ -17,11 +21,24 @@ from .config import PlayerNotExist
 from .core_commands import Core
 from .events import Events
 from .global_checks import init_global_checks
+from .http import HTTPClient
+from .feeds import Feed
+from .feeds import MINECRAFT_NEWS_RSS
+from .mojang import MojangStatus
+from .mojang import SalesStats
+from .mojang import VersionManifest
+from .player_cache import PlayerManager
+from .server_monitor import ServerMonitor
+from .server_ping import BedrockPinger
 from .settings_cache import I18nManager
 from .settings_cache import PrefixManager
 from .settings_cache import AccountManager
 from .settings_cache import GuildManager
 from .settings_cache import RconManager
+from .settings_cache import CacheBackend
+from .settings_cache import listen_for_invalidations
+
+log = logging.getLogger("obsidion")
 
 
 class Obsidion(AutoShardedBot):
@@ -39,14 +56,25 @@ class Obsidion(AutoShardedBot):
         self.redis = None
         self.db = None
         self.http_session = None
+        self.http_client = None
+        self.bedrock_pinger = BedrockPinger()
         self._connector = None
         self._resolver = None
+        self._invalidation_task = None
+        self._warmed_shards = set()
 
+        self._cache_backend = CacheBackend(self)
         self._prefix_cache = PrefixManager(self)
         self._i18n_cache = I18nManager(self)
         self._account_cache = AccountManager(self)
         self._guild_cache = GuildManager(self)
         self._rcon_cache = RconManager(self)
+        self._player_cache = PlayerManager(self)
+        self.server_monitor = ServerMonitor(self)
+        self.version_manifest = VersionManifest(self)
+        self.mojang_status = MojangStatus(self)
+        self.sales_stats = SalesStats(self)
+        self.news_feed = Feed(self, MINECRAFT_NEWS_RSS)
 
         async def prefix_manager(bot, message):
             prefixes = await self._prefix_cache.get_prefixes(message.guild)
@@ -60,6 +88,9 @@ class Obsidion(AutoShardedBot):
 
         self.redis = await aioredis.create_redis_pool(str(get_settings().REDIS))
         self.db = await asyncpg.create_pool(str(get_settings().DB))
+        self._invalidation_task = asyncio.create_task(listen_for_invalidations(self))
+        self._player_cache.refresh_popular.start()
+        self.server_monitor.probe.start()
         self._resolver = aiohttp.AsyncResolver()
         # Use AF_INET as its socket family to prevent HTTPS related
         # problems both locally and in production.
@@ -71,6 +102,10 @@ class Obsidion(AutoShardedBot):
         # Client.login() will call HTTPClient.static_login()
         # which will create a session using this connector attribute.
         self.http_session = aiohttp.ClientSession(connector=self._connector)
+        self.http_client = HTTPClient(self.http_session)
+        self.version_manifest.refresh_loop.start()
+        self.mojang_status.poll.start()
+        self.sales_stats.refresh.start()
 
         # Load important cogs
         self.add_cog(Events(self))
@@ -98,6 +133,17 @@ class Obsidion(AutoShardedBot):
         await self.pre_flight()
         return await super().start(*args, **kwargs)
 
+    async def on_shard_ready(self, shard_id: int) -> None:
+        """Warm the settings cache for every guild on a shard that is ready."""
+        if shard_id in self._warmed_shards:
+            return
+        self._warmed_shards.add(shard_id)
+        guild_ids = [guild.id for guild in self.guilds if guild.shard_id == shard_id]
+        await self._guild_cache.warm(guild_ids)
+        log.info(
+            "Warmed settings cache for %s guilds on shard %s", len(guild_ids), shard_id
+        )
+
     async def message_eligible_as_command(self, message: discord.Message) -> bool:
         """
         Runs through the things which apply globally about commands
@@ -176,51 +222,48 @@ class Obsidion(AutoShardedBot):
         else:
             self._shutdown_mode = ExitCodes.RESTART
 
+        self.bedrock_pinger.close()
         await self.logout()
         sys.exit(self._shutdown_mode)
 
     async def mojang_player(
         self, user: discord.User, username: Optional[str] = None
-    ) -> str:
-        """Takes in an mc username and tries to convert it to a mc uuid.
+    ) -> Dict[str, Any]:
+        """Takes in an mc username or uuid and gets the player's profile.
+
+        Concurrent lookups for the same player share a single request.
 
         Args:
-        username (str): username of player which uuid will be from
-        bot (Obsidion): Obsidion bot
+        user (discord.User): user whose linked account is used without a username
+        username (str): username or uuid of the player
 
         Returns:
-        str: uuid of player
+        Dict[str, Any]: profile of the player
         """
         if username is None:
             uuid = await self._account_cache.get_account(user)
             if uuid is None:
                 raise PlayerNotExist()
-        else:
-            username_key = f"username_{username}"
-            if await self.redis.exists(username_key):
-                uuid = (await self.redis.get(username_key)).decode("UTF-8")
-            else:
-                uuid = username
-        key = f"player_{str(uuid)}"
-        if await self.redis.exists(key):
-            data = json.loads(await self.redis.get(key))
-        else:
-            url = f"https://api.ashcon.app/mojang/v2/user/{str(uuid)}"
-            async with self.http_session.get(url) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                else:
-                    data = None
-        if data is not None:
-            uuid = data["uuid"]
-        key = f"player_{uuid}"
-        await self.redis.set(key, json.dumps(data), expire=28800)
+            username = str(uuid)
+        data = await self._player_cache.get_player(username)
         if data is None:
             raise PlayerNotExist()
-        username_key = f"username_{data['username']}"
-        await self.redis.set(username_key, str(uuid), expire=28800)
         return data
 
+    async def resolve_players(
+        self, players: List[str]
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Get the profiles of many players, in the order given.
+
+        Args:
+        players (List[str]): usernames or uuids of the players
+
+        Returns:
+        List[Optional[Dict[str, Any]]]: profile of each player, None if the
+        player does not exist
+        """
+        return await self._player_cache.get_players(players)
+
 
 class ExitCodes(IntEnum):
     # This needs to be an int enum to be used
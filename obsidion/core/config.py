@@ -32,6 +32,9 @@ class Settings(BaseSettings):
     REDIS: RedisDsn = None
     DEV: bool = False
     COLOR: Color = "0x00FF00"
+    # Seconds between pings of every guild's linked server.
+    SERVER_MONITOR_INTERVAL: PositiveInt = 300
+    SERVER_MONITOR_CONCURRENCY: PositiveInt = 50
 
     class Config:
         """Config for pydantic."""
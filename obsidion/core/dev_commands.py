@@ -400,6 +400,33 @@ class Dev(commands.Cog):
 
         ctx.bot.dispatch("message", msg)
 
+    @commands.command()
+    @commands.is_owner()
+    async def cachestats(self, ctx):
+        """Show the hit, miss and eviction counters of the local settings cache."""
+        backend = self.bot._cache_backend
+        stats = backend.local.stats()
+        stats["known defaults"] = len(backend.known_defaults)
+        msg = "\n".join(f"{name}: {value:,}" for name, value in stats.items())
+        await ctx.send(box(msg))
+
+    @commands.command()
+    @commands.is_owner()
+    async def httpstats(self, ctx):
+        """Show request, latency and error metrics for each outbound host."""
+        stats = self.bot.http_client.stats()
+        if not stats:
+            await ctx.send(_("No outbound requests have been made yet."))
+            return
+        msg = "\n".join(
+            f"{host}: {s['requests']:,} requests, {s['errors']:,} errors, "
+            f"{s['retries']:,} retries, {s['rejected']:,} rejected, "
+            f"avg {s['avg_latency'] * 1000:.0f}ms, "
+            f"max {s['max_latency'] * 1000:.0f}ms, breaker {s['breaker']}"
+            for host, s in stats.items()
+        )
+        await ctx.send(box(msg))
+
     @commands.command(name="mockmsg")
     @commands.is_owner()
     async def mock_msg(self, ctx, user: discord.Member, *, content: str):
@@ -0,0 +1,113 @@
+"""Incrementally fetched RSS feeds."""
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from time import mktime
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import feedparser
+import pytz
+
+from .http import HTTPError
+
+log = logging.getLogger("obsidion")
+
+MINECRAFT_NEWS_RSS = "https://www.minecraft.net/en-us/feeds/community-content/rss"
+
+
+@dataclass(frozen=True)
+class FeedEntry:
+    """A feed item, keyed by its GUID."""
+
+    guid: str
+    published: datetime
+    data: Dict[str, Any]
+
+
+class Feed:
+    """An RSS feed fetched with conditional requests.
+
+    The body is only parsed when it changed, and entries are merged into
+    an index keyed by GUID so items seen earlier are kept even once they
+    drop out of the feed. Checks closer together than `min_interval`
+    seconds are answered from memory.
+    """
+
+    def __init__(
+        self, bot, url: str, min_interval: float = 60.0, max_entries: int = 200
+    ) -> None:
+        self._bot = bot
+        self.url = url
+        self.min_interval = min_interval
+        self.max_entries = max_entries
+        self._entries: Dict[str, FeedEntry] = {}
+        self._ordered: List[FeedEntry] = []
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
+        self._digest: Optional[bytes] = None
+        self._checked = 0.0
+        self._lock = asyncio.Lock()
+
+    async def refresh(self, force: bool = False) -> None:
+        """Check the feed for changes."""
+        async with self._lock:
+            if not force and time.monotonic() - self._checked < self.min_interval:
+                return
+            self._checked = time.monotonic()
+            headers = {}
+            if self._etag is not None:
+                headers["If-None-Match"] = self._etag
+            if self._last_modified is not None:
+                headers["If-Modified-Since"] = self._last_modified
+            try:
+                response = await self._bot.http_client.get(self.url, headers=headers)
+            except HTTPError as e:
+                log.warning("Could not refresh %s: %s", self.url, e)
+                return
+            if response.status != 200:
+                if response.status != 304:
+                    log.warning("%s returned %s", self.url, response.status)
+                return
+            self._etag = response.headers.get("ETag")
+            self._last_modified = response.headers.get("Last-Modified")
+
+            # Some servers ignore conditional requests, so compare bodies too.
+            digest = hashlib.sha1(response.body).digest()
+            if digest == self._digest:
+                return
+            self._digest = digest
+            self._merge(feedparser.parse(response.body)["entries"])
+
+    def _merge(self, entries: List[Dict[str, Any]]) -> None:
+        for entry in entries:
+            guid = entry.get("id") or entry.get("link")
+            parsed = entry.get("published_parsed")
+            if guid is None or parsed is None:
+                continue
+            published = datetime.fromtimestamp(mktime(parsed), pytz.utc)
+            self._entries[guid] = FeedEntry(guid, published, entry)
+        self._ordered = sorted(
+            self._entries.values(), key=lambda entry: entry.published, reverse=True
+        )[: self.max_entries]
+        self._entries = {entry.guid: entry for entry in self._ordered}
+
+    async def latest(self, count: int) -> List[FeedEntry]:
+        """The newest `count` entries, newest first."""
+        await self.refresh()
+        return self._ordered[:count]
+
+    async def entries_since(self, watermark: datetime) -> List[FeedEntry]:
+        """Entries published after `watermark`, newest first."""
+        await self.refresh()
+        entries = []
+        for entry in self._ordered:
+            if entry.published <= watermark:
+                break
+            entries.append(entry)
+        return entries
@@ -0,0 +1,310 @@
+"""Outbound HTTP client shared by the bot and its cogs."""
+import asyncio
+import json
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Any
+from typing import Dict
+from typing import Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+from multidict import CIMultiDictProxy
+
+log = logging.getLogger("obsidion")
+
+# Methods that are safe to send again after a failure.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Statuses worth retrying, as the next attempt may well succeed.
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class HTTPError(Exception):
+    """A request could not be completed."""
+
+    pass
+
+
+class HostUnavailable(HTTPError):
+    """The host's circuit breaker is open so the request was not sent."""
+
+    pass
+
+
+class TokenBucket:
+    """Token bucket allowing `rate` acquisitions per second, up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    @property
+    def tokens(self) -> float:
+        """Tokens currently available."""
+        elapsed = time.monotonic() - self._updated
+        return min(self.capacity, self._tokens + elapsed * self.rate)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def set_tokens(self, tokens: float) -> None:
+        """Bring the bucket in line with a budget reported by the server."""
+        self._tokens = max(0.0, min(self.capacity, tokens))
+        self._updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class CircuitBreaker:
+    """Fail fast while a host keeps failing.
+
+    After `threshold` consecutive failures the breaker opens and requests
+    are refused. Once `reset_timeout` seconds have passed a single trial
+    request is let through; success closes the breaker, failure opens it
+    again.
+    """
+
+    def __init__(self, threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now."""
+        state = self.state
+        if state == "half-open":
+            # Let this request through as the trial and hold the rest back.
+            self._opened_at = time.monotonic()
+            return True
+        return state == "closed"
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self._opened_at = time.monotonic()
+
+
+@dataclass(frozen=True)
+class HostPolicy:
+    """Limits applied to every request sent to a host."""
+
+    rate: float = 10.0
+    burst: float = 20.0
+    concurrency: int = 10
+    total_timeout: float = 10.0
+    connect_timeout: float = 3.0
+    retries: int = 2
+    backoff: float = 0.5
+    failure_threshold: int = 5
+    reset_timeout: float = 30.0
+
+
+DEFAULT_POLICIES = {
+    "api.ashcon.app": HostPolicy(rate=10.0, burst=20.0),
+    # Mojang allows 600 requests per 10 minutes.
+    "api.mojang.com": HostPolicy(rate=1.0, burst=10.0, concurrency=5),
+    "launchermeta.mojang.com": HostPolicy(rate=2.0, burst=5.0),
+    "minecraft.gamepedia.com": HostPolicy(rate=5.0, burst=10.0),
+    "www.minecraft.net": HostPolicy(rate=2.0, burst=5.0, total_timeout=15.0),
+}
+
+
+class HostMetrics:
+    """Request counters and latency for a single host."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.rejected = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def record(self, latency: float, error: bool) -> None:
+        self.requests += 1
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+        if error:
+            self.errors += 1
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "rejected": self.rejected,
+            "avg_latency": self.latency_total / self.requests if self.requests else 0,
+            "max_latency": self.latency_max,
+        }
+
+
+@dataclass(frozen=True)
+class Response:
+    """A fully read response, so the connection is already released."""
+
+    status: int
+    headers: "CIMultiDictProxy[str]"
+    body: bytes
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+    def text(self, encoding: str = "utf-8") -> str:
+        return self.body.decode(encoding, errors="replace")
+
+
+class _Host:
+    def __init__(self, policy: HostPolicy) -> None:
+        self.policy = policy
+        self.bucket = TokenBucket(policy.rate, policy.burst)
+        self.semaphore = asyncio.Semaphore(policy.concurrency)
+        self.breaker = CircuitBreaker(policy.failure_threshold, policy.reset_timeout)
+        self.metrics = HostMetrics()
+        self.timeout = aiohttp.ClientTimeout(
+            total=policy.total_timeout, connect=policy.connect_timeout
+        )
+
+
+class HTTPClient:
+    """Wrapper around the bot's `aiohttp.ClientSession`.
+
+    Every host gets a token bucket rate limit, a concurrency cap, timeouts
+    and a circuit breaker. Idempotent requests are retried with jittered
+    exponential backoff.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        policies: Optional[Dict[str, HostPolicy]] = None,
+        default_policy: HostPolicy = HostPolicy(),
+    ) -> None:
+        self._session = session
+        self._policies = DEFAULT_POLICIES if policies is None else policies
+        self._default_policy = default_policy
+        self._hosts: Dict[str, _Host] = {}
+
+    def _host(self, url: str) -> _Host:
+        name = urlsplit(url).hostname or ""
+        host = self._hosts.get(name)
+        if host is None:
+            host = _Host(self._policies.get(name, self._default_policy))
+            self._hosts[name] = host
+        return host
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> Response:
+        """Send a request and read the whole response.
+
+        Raises
+        ------
+        HostUnavailable
+            If the host's circuit breaker is open.
+        HTTPError
+            If the request failed or timed out after every retry.
+        """
+        host = self._host(url)
+        policy = host.policy
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        attempts = 1 + (policy.retries if idempotent else 0)
+        kwargs.setdefault("timeout", host.timeout)
+        error: Optional[Exception] = None
+
+        for attempt in range(attempts):
+            if not host.breaker.allow():
+                host.metrics.rejected += 1
+                raise HostUnavailable(f"{urlsplit(url).hostname} is unavailable")
+            if attempt:
+                host.metrics.retries += 1
+                # Full jitter keeps retries from many callers spread out.
+                await asyncio.sleep(random.uniform(0, policy.backoff * 2 ** attempt))
+
+            await host.bucket.acquire()
+            async with host.semaphore:
+                start = time.monotonic()
+                try:
+                    async with self._session.request(method, url, **kwargs) as resp:
+                        body = await resp.read()
+                        response = Response(resp.status, resp.headers, body)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    host.metrics.record(time.monotonic() - start, error=True)
+                    host.breaker.record_failure()
+                    error = e
+                    continue
+            failed = response.status >= 500 or response.status == 429
+            host.metrics.record(time.monotonic() - start, error=failed)
+            if response.status >= 500:
+                host.breaker.record_failure()
+            else:
+                host.breaker.record_success()
+            if response.status not in RETRY_STATUSES or attempt == attempts - 1:
+                return response
+
+        raise HTTPError(f"{method} {url} failed: {error!r}") from error
+
+    async def get(self, url: str, **kwargs: Any) -> Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def get_json(self, url: str, **kwargs: Any) -> Optional[Any]:
+        """Get a JSON document, or None if the request did not succeed."""
+        try:
+            response = await self.get(url, **kwargs)
+        except HTTPError as e:
+            log.warning("%s", e)
+            return None
+        if response.status != 200:
+            return None
+        try:
+            return response.json()
+        except ValueError:
+            log.warning("Invalid JSON from %s", url)
+            return None
+
+    async def get_text(self, url: str, **kwargs: Any) -> Optional[str]:
+        """Get a text document, or None if the request did not succeed."""
+        try:
+            response = await self.get(url, **kwargs)
+        except HTTPError as e:
+            log.warning("%s", e)
+            return None
+        return response.text() if response.status == 200 else None
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Latency, error and circuit breaker state for every host used."""
+        return {
+            name: {**host.metrics.stats(), "breaker": host.breaker.state}
+            for name, host in self._hosts.items()
+        }
@@ -0,0 +1,38 @@
+"""Elect one process to run work shared by the whole bot."""
+from .settings_cache import PROCESS_ID
+
+_RENEW_LEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class Lease:
+    """A Redis lock held for `ttl` seconds unless renewed.
+
+    Only the holder can renew it, so if the leader dies another process
+    takes over once the lease runs out.
+    """
+
+    def __init__(self, bot, key: str, ttl: int) -> None:
+        self._bot = bot
+        self.key = key
+        self.ttl = ttl
+
+    async def acquire(self) -> bool:
+        """Take or renew the lease, returning whether this process holds it."""
+        renewed = await self._bot.redis.eval(
+            _RENEW_LEASE, keys=[self.key], args=[PROCESS_ID, self.ttl]
+        )
+        if renewed:
+            return True
+        return bool(
+            await self._bot.redis.set(
+                self.key,
+                PROCESS_ID,
+                expire=self.ttl,
+                exist=self._bot.redis.SET_IF_NOT_EXIST,
+            )
+        )
@@ -0,0 +1,294 @@
+"""Cached views of Mojang's public data."""
+import asyncio
+import json
+import logging
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any
+from typing import Deque
+from typing import Dict
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Tuple
+
+from discord.ext import tasks
+
+from .config import get_settings
+from .http import HTTPError
+from .lease import Lease
+
+log = logging.getLogger("obsidion")
+
+VERSION_MANIFEST_URL = "https://launchermeta.mojang.com/mc/game/version_manifest.json"
+
+# "1.16" from "1.16.5", "1.16-pre1" or "1.16".
+_MAJOR = re.compile(r"^(\d+\.\d+)")
+
+
+@dataclass(frozen=True)
+class VersionIndex:
+    """Parsed version manifest.
+
+    `versions` is newest first, as in the manifest, while each tuple in
+    `by_major` is oldest first.
+    """
+
+    versions: Tuple[Dict[str, Any], ...]
+    by_id: Mapping[str, Dict[str, Any]]
+    by_major: Mapping[str, Tuple[Dict[str, Any], ...]]
+    latest_release: Optional[Dict[str, Any]]
+    latest_snapshot: Optional[Dict[str, Any]]
+
+    @classmethod
+    def from_manifest(cls, data: Dict[str, Any]) -> "VersionIndex":
+        versions = tuple(data["versions"])
+        by_major: Dict[str, list] = {}
+        for version in reversed(versions):
+            match = _MAJOR.match(version["id"])
+            if match is not None:
+                by_major.setdefault(match.group(1), []).append(version)
+        by_id = {version["id"]: version for version in versions}
+        latest = data.get("latest", {})
+        return cls(
+            versions=versions,
+            by_id=MappingProxyType(by_id),
+            by_major=MappingProxyType(
+                {major: tuple(entries) for major, entries in by_major.items()}
+            ),
+            latest_release=by_id.get(latest.get("release")),
+            latest_snapshot=by_id.get(latest.get("snapshot")),
+        )
+
+
+class VersionManifest:
+    """Mojang's version manifest, refreshed in the background.
+
+    Refreshes are conditional requests, so an unchanged manifest costs a
+    304 rather than a download. The index is replaced as a whole, so
+    readers never see a half-built one.
+    """
+
+    def __init__(self, bot) -> None:
+        self._bot = bot
+        self.index: Optional[VersionIndex] = None
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
+        self._lock = asyncio.Lock()
+
+    async def refresh(self) -> Optional[VersionIndex]:
+        """Fetch the manifest if it changed and rebuild the index."""
+        async with self._lock:
+            headers = {}
+            if self._etag is not None:
+                headers["If-None-Match"] = self._etag
+            if self._last_modified is not None:
+                headers["If-Modified-Since"] = self._last_modified
+            try:
+                response = await self._bot.http_client.get(
+                    VERSION_MANIFEST_URL, headers=headers
+                )
+            except HTTPError as e:
+                log.warning("Could not refresh the version manifest: %s", e)
+                return self.index
+            if response.status == 200:
+                self.index = VersionIndex.from_manifest(response.json())
+                self._etag = response.headers.get("ETag")
+                self._last_modified = response.headers.get("Last-Modified")
+            elif response.status != 304:
+                log.warning("Version manifest returned %s", response.status)
+            return self.index
+
+    async def get_index(self) -> Optional[VersionIndex]:
+        """The current index, fetching it first if there is none yet."""
+        if self.index is None:
+            return await self.refresh()
+        return self.index
+
+    @tasks.loop(minutes=5)
+    async def refresh_loop(self) -> None:
+        await self.refresh()
+
+
+class MojangStatus:
+    """Single poller for the status of Mojang's services.
+
+    Only the process holding the lease asks the API, storing the snapshot
+    and any changes in Redis; the others read the snapshot from there.
+    Every process then dispatches the services whose status changed since
+    it last looked as a ``mojang_status_change`` event, so each can post
+    to the guilds on its own shards.
+    """
+
+    def __init__(self, bot, history: int = 100) -> None:
+        self._bot = bot
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.history: Deque[Dict[str, Any]] = deque(maxlen=history)
+        # Outlives a couple of missed polls before another process takes over.
+        self.lease = Lease(bot, "mojang_status_leader", ttl=3 * 60)
+
+    @staticmethod
+    def diff(
+        old: Optional[Dict[str, str]], new: Dict[str, str], checked: float
+    ) -> List[Dict[str, Any]]:
+        """Services whose status differs between two sets of services."""
+        if old is None:
+            return []
+        return [
+            {
+                "service": service,
+                "old": old.get(service),
+                "new": status,
+                "time": checked,
+            }
+            for service, status in new.items()
+            if old.get(service) != status
+        ]
+
+    async def get_snapshot(self) -> Optional[Dict[str, Any]]:
+        """Latest ``{"services": ..., "checked": ...}`` snapshot."""
+        if self.snapshot is None:
+            raw = await self._bot.redis.get("mojang_status")
+            if raw is not None:
+                self.snapshot = json.loads(raw)
+        return self.snapshot
+
+    async def get_history(self, count: int = 10) -> List[Dict[str, Any]]:
+        """The most recent status changes seen by any process, newest first."""
+        raw = await self._bot.redis.lrange("mojang_status_history", 0, count - 1)
+        return [json.loads(change) for change in raw]
+
+    @tasks.loop(minutes=1)
+    async def poll(self) -> None:
+        # An uncaught error would stop the loop for good.
+        try:
+            await self.check()
+        except Exception:
+            log.exception("Could not poll the Mojang service status")
+
+    async def check(self) -> None:
+        """Get the latest snapshot and dispatch what changed."""
+        previous = await self.get_snapshot()
+        if await self.lease.acquire():
+            snapshot = await self.fetch()
+        else:
+            raw = await self._bot.redis.get("mojang_status")
+            snapshot = json.loads(raw) if raw is not None else None
+        if snapshot is None:
+            return
+        self.snapshot = snapshot
+
+        changes = self.diff(
+            previous["services"] if previous is not None else None,
+            snapshot["services"],
+            snapshot["checked"],
+        )
+        if changes:
+            self.history.extendleft(changes)
+            self._bot.dispatch("mojang_status_change", changes)
+
+    async def fetch(self) -> Optional[Dict[str, Any]]:
+        """Ask the API for a new snapshot and share it with the other processes."""
+        services = await self._bot.http_client.get_json(
+            f"{get_settings().API_URL}/mojang/check"
+        )
+        if not services:
+            return None
+        snapshot = {"services": services, "checked": time.time()}
+
+        shared = await self._bot.redis.getset("mojang_status", json.dumps(snapshot))
+        shared_changes = self.diff(
+            json.loads(shared)["services"] if shared is not None else None,
+            services,
+            snapshot["checked"],
+        )
+        if shared_changes:
+            pipe = self._bot.redis.pipeline()
+            pipe.lpush(
+                "mojang_status_history", *(json.dumps(c) for c in shared_changes)
+            )
+            pipe.ltrim("mojang_status_history", 0, self.history.maxlen - 1)
+            await pipe.execute()
+        return snapshot
+
+
+SALES_URL = "https://api.mojang.com/orders/statistics"
+
+# Metrics summed into the sales total.
+SALES_METRICS = ["item_sold_minecraft", "prepaid_card_redeemed_minecraft"]
+
+
+class SalesStats:
+    """Bounded time series of Minecraft sales, refreshed in the background.
+
+    Points are ``(timestamp, total, last24h)`` and cover a little over a
+    day, so a 24 hour delta can be read from memory. Only the process
+    holding the lease asks Mojang, appending to a series in Redis which
+    every process copies.
+    """
+
+    def __init__(self, bot, interval: int = 10, window: int = 86400) -> None:
+        self._bot = bot
+        self.series: Deque[Tuple[float, int, int]] = deque(
+            maxlen=window // (interval * 60) + 2
+        )
+        self.lease = Lease(bot, "sales_stats_leader", ttl=interval * 60 * 3)
+        self.refresh.change_interval(minutes=interval)
+
+    def latest(self) -> Optional[Tuple[float, int, int]]:
+        """The most recent point, or None before the first refresh."""
+        return self.series[-1] if self.series else None
+
+    def delta(self, seconds: float = 86400) -> Optional[int]:
+        """Sales over the last `seconds`, from the oldest point that old.
+
+        Falls back to Mojang's own ``last24h`` figure until the series
+        covers the whole period.
+        """
+        latest = self.latest()
+        if latest is None:
+            return None
+        for timestamp, total, _ in self.series:
+            if latest[0] - timestamp <= seconds:
+                if latest[0] - timestamp >= seconds * 0.95:
+                    return latest[1] - total
+                break
+        return latest[2]
+
+    @tasks.loop(minutes=10)
+    async def refresh(self) -> None:
+        # An uncaught error would stop the loop for good.
+        try:
+            if await self.lease.acquire():
+                await self.fetch()
+            await self.load()
+        except Exception:
+            log.exception("Could not refresh sales statistics")
+
+    async def load(self) -> None:
+        """Copy the shared series from Redis."""
+        raw = await self._bot.redis.lrange("sales_stats", 0, -1)
+        self.series.clear()
+        self.series.extend(tuple(json.loads(point)) for point in raw)
+
+    async def fetch(self) -> None:
+        """Append the current sales figures to the shared series."""
+        try:
+            response = await self._bot.http_client.post(
+                SALES_URL, json={"metricKeys": SALES_METRICS}
+            )
+        except HTTPError as e:
+            log.warning("Could not refresh sales statistics: %s", e)
+            return
+        if response.status != 200:
+            log.warning("Sales statistics returned %s", response.status)
+            return
+        data = response.json()
+        point = (time.time(), data["total"], data["last24h"])
+        pipe = self._bot.redis.pipeline()
+        pipe.rpush("sales_stats", json.dumps(point))
+        pipe.ltrim("sales_stats", -self.series.maxlen, -1)
+        await pipe.execute()
@@ -0,0 +1,289 @@
+"""Cache of Minecraft player profiles from the ashcon API."""
+import asyncio
+import json
+import logging
+import time
+import uuid as _uuid
+from collections import Counter
+from string import hexdigits
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import TypeVar
+
+from discord.ext import tasks
+
+from .http import HTTPError
+from .settings_cache import MISSING
+from .utils.utils import divide_array
+
+log = logging.getLogger("obsidion")
+
+T = TypeVar("T")
+
+PROFILE_URL = "https://api.ashcon.app/mojang/v2/user/{}"
+
+# Bulk username to UUID lookup, limited to 10 names per request.
+BULK_UUID_URL = "https://api.mojang.com/profiles/minecraft"
+BULK_UUID_LIMIT = 10
+
+# Release a lock only if it is still held by the token that took it.
+_RELEASE_LOCK = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one in-flight task."""
+
+    def __init__(self) -> None:
+        self._tasks: Dict[str, "asyncio.Future[Any]"] = {}
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        """Await `func`, sharing its result with any caller using the same key.
+
+        The shared task is shielded so one caller being cancelled does not
+        cancel it for everyone else.
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        return await asyncio.shield(task)
+
+
+def normalise(ident: str) -> str:
+    """Normalise a username or UUID so equivalent spellings share a key."""
+    return ident.strip().lower().replace("-", "")
+
+
+def is_uuid(key: str) -> bool:
+    """Whether a normalised key is a UUID rather than a username."""
+    return len(key) == 32 and all(c in hexdigits for c in key)
+
+
+class PlayerManager:
+    """Resolve player profiles by username or UUID.
+
+    Concurrent lookups for the same player in this process share a single
+    request, and a short Redis lock stops other processes from fetching the
+    same profile at the same moment.
+
+    Profiles are kept for `expire` seconds but are considered stale after
+    `soft_expire`. A stale profile is still returned straight away while a
+    background task refreshes it. The most requested profiles are refreshed
+    ahead of time by `refresh_popular` so they never go stale.
+    """
+
+    def __init__(
+        self,
+        bot,
+        expire: int = 28800,
+        soft_expire: int = 3600,
+        lock_timeout: float = 5.0,
+        popular_count: int = 50,
+        max_concurrency: int = 10,
+    ) -> None:
+        self._bot = bot
+        self.expire = expire
+        self.soft_expire = soft_expire
+        self.lock_timeout = lock_timeout
+        self.popular_count = popular_count
+        self._flight = SingleFlight()
+        self._hits: Counter = Counter()
+        self._background: Set["asyncio.Future[Any]"] = set()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def get_player(self, ident: str) -> Optional[Dict[str, Any]]:
+        """Get a player's profile, or None if the player does not exist."""
+        key = normalise(ident)
+        return await self._flight.do(key, lambda: self._resolve(key))
+
+    async def get_players(
+        self, idents: Iterable[str]
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Get the profiles of many players at once, in the order given.
+
+        Cached profiles are read with a single MGET. Remaining usernames are
+        turned into UUIDs with Mojang's bulk endpoint, and the profiles that
+        are still missing are fetched concurrently.
+        """
+        keys = [normalise(ident) for ident in idents]
+        unique = list(dict.fromkeys(keys))
+        resolved = await self._resolve_usernames(unique)
+        profiles = await self._cached_many(set(resolved.values()))
+
+        pending = {key for key in resolved.values() if key not in profiles}
+        names = [key for key in pending if not is_uuid(key)]
+        if names:
+            uuids = await self._bulk_uuids(names)
+            for key, uuid in resolved.items():
+                if uuid in uuids:
+                    resolved[key] = uuids[uuid]
+            profiles.update(await self._cached_many(set(uuids.values())))
+            pending = {key for key in resolved.values() if key not in profiles}
+
+        async def fetch(key: str) -> None:
+            async with self._semaphore:
+                profiles[key] = await self.get_player(key)
+
+        await asyncio.gather(*(fetch(key) for key in pending))
+        return [profiles.get(resolved[key]) for key in keys]
+
+    async def _resolve_usernames(self, keys: List[str]) -> Dict[str, str]:
+        """Map each key to a UUID where one is cached, otherwise to itself."""
+        names = [key for key in keys if not is_uuid(key)]
+        resolved = {key: key for key in keys}
+        if names:
+            uuids = await self._bot.redis.mget(
+                *(f"username_{name}" for name in names), encoding="utf-8"
+            )
+            for name, uuid in zip(names, uuids):
+                if uuid is not None:
+                    resolved[name] = uuid
+        return resolved
+
+    async def _cached_many(self, keys: Set[str]) -> Dict[str, Any]:
+        """Read many cached profiles with a single MGET."""
+        if not keys:
+            return {}
+        keys_list = list(keys)
+        raws = await self._bot.redis.mget(*(f"profile_{key}" for key in keys_list))
+        profiles = {}
+        for key, raw in zip(keys_list, raws):
+            if raw is None:
+                continue
+            entry = json.loads(raw)
+            self._hits[key] += 1
+            if self._is_stale(entry):
+                self._refresh_in_background(key)
+            profiles[key] = entry["data"]
+        return profiles
+
+    async def _bulk_uuids(self, names: List[str]) -> Dict[str, str]:
+        """Turn usernames into UUIDs, 10 names per request, concurrently."""
+        uuids: Dict[str, str] = {}
+
+        async def fetch(batch: List[str]) -> None:
+            async with self._semaphore:
+                try:
+                    resp = await self._bot.http_client.post(BULK_UUID_URL, json=batch)
+                except HTTPError:
+                    return
+            if resp.status != 200:
+                return
+            for profile in resp.json():
+                uuids[normalise(profile["name"])] = normalise(profile["id"])
+
+        await asyncio.gather(
+            *(fetch(batch) for batch in divide_array(names, BULK_UUID_LIMIT))
+        )
+        return uuids
+
+    async def _cached(self, key: str) -> Any:
+        raw = await self._bot.redis.get(f"profile_{key}")
+        return json.loads(raw) if raw is not None else MISSING
+
+    def _is_stale(self, entry: Dict[str, Any], ahead: float = 0) -> bool:
+        return time.time() - entry["fetched"] > self.soft_expire - ahead
+
+    async def _resolve(self, key: str) -> Optional[Dict[str, Any]]:
+        uuid = await self._bot.redis.get(f"username_{key}", encoding="utf-8")
+        if uuid is not None:
+            key = uuid
+        entry = await self._cached(key)
+        if entry is MISSING:
+            data = await self._fetch_locked(key)
+            return data if data is not MISSING else None
+
+        self._hits[key] += 1
+        if self._is_stale(entry):
+            self._refresh_in_background(key)
+        return entry["data"]
+
+    def _refresh_in_background(self, key: str) -> None:
+        task = asyncio.ensure_future(
+            self._flight.do(
+                f"refresh_{key}", lambda: self._fetch_locked(key, wait=False)
+            )
+        )
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _fetch_locked(self, key: str, wait: bool = True) -> Any:
+        """Fetch and store a profile while holding the cross-process lock.
+
+        If another process holds the lock this either waits for its result
+        or, when `wait` is False, leaves the refresh to it.
+        """
+        lock = f"lock:profile_{key}"
+        token = _uuid.uuid4().hex
+        locked = await self._bot.redis.set(
+            lock,
+            token,
+            pexpire=int(self.lock_timeout * 1000),
+            exist=self._bot.redis.SET_IF_NOT_EXIST,
+        )
+        if not locked:
+            if not wait:
+                return MISSING
+            # Another process is fetching this player, wait for its result.
+            for _ in range(int(self.lock_timeout / 0.1)):
+                await asyncio.sleep(0.1)
+                entry = await self._cached(key)
+                if entry is not MISSING and not self._is_stale(entry):
+                    return entry["data"]
+        try:
+            data = await self._fetch(key)
+            if data is not MISSING:
+                await self._store(key, data)
+        finally:
+            if locked:
+                await self._bot.redis.eval(_RELEASE_LOCK, keys=[lock], args=[token])
+        return data
+
+    async def _fetch(self, key: str) -> Any:
+        """Fetch a profile, `MISSING` if the API could not answer."""
+        try:
+            resp = await self._bot.http_client.get(PROFILE_URL.format(key))
+        except HTTPError:
+            return MISSING
+        if resp.status == 200:
+            return resp.json()
+        if resp.status == 404:
+            return None
+        return MISSING
+
+    async def _store(self, key: str, data: Optional[Dict[str, Any]]) -> None:
+        entry = json.dumps({"data": data, "fetched": time.time()})
+        pipe = self._bot.redis.pipeline()
+        pipe.set(f"profile_{key}", entry, expire=self.expire)
+        if data is not None:
+            uuid = normalise(data["uuid"])
+            pipe.set(f"profile_{uuid}", entry, expire=self.expire)
+            username = normalise(data["username"])
+            pipe.set(f"username_{username}", uuid, expire=self.expire)
+        await pipe.execute()
+
+    @tasks.loop(minutes=5)
+    async def refresh_popular(self) -> None:
+        """Refresh the most requested profiles before they go stale."""
+        popular = [key for key, _ in self._hits.most_common(self.popular_count)]
+        self._hits.clear()
+        ahead = self.refresh_popular.minutes * 60
+        for key in popular:
+            entry = await self._cached(key)
+            if entry is not MISSING and self._is_stale(entry, ahead):
+                self._refresh_in_background(key)
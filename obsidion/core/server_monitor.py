@@ -0,0 +1,162 @@
+"""Background status monitor for the servers guilds have linked."""
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from discord.ext import tasks
+
+from .config import get_settings
+from .lease import Lease
+from .server_ping import ping_java
+from .server_ping import ServerUnreachable
+
+log = logging.getLogger("obsidion")
+
+
+def split_address(address: str) -> Tuple[str, Optional[int]]:
+    """Split a linked ``host[:port]`` address into its host and port."""
+    host, _, port = address.strip().partition(":")
+    return host.lower(), int(port) if port.isdigit() else None
+
+
+def normalise_address(address: str) -> str:
+    """Canonical form of an address, so equal servers share a snapshot."""
+    host, port = split_address(address)
+    return host if port is None else f"{host}:{port}"
+
+
+class ServerMonitor:
+    """Periodically ping every distinct server linked by the bot's guilds.
+
+    Only the process holding the lease pings, and addresses shared by
+    several guilds are only pinged once per round. Each result is written to
+    Redis as a snapshot so the server command can answer straight away.
+    Every process then compares the snapshots of the servers its own guilds
+    link with what it saw last round, and dispatches a
+    ``server_status_change`` event with those guild ids whenever a server
+    goes down or comes back.
+    """
+
+    def __init__(self, bot, concurrency: Optional[int] = None) -> None:
+        self._bot = bot
+        settings = get_settings()
+        self.interval = settings.SERVER_MONITOR_INTERVAL
+        self.concurrency = concurrency or settings.SERVER_MONITOR_CONCURRENCY
+        self.online: Dict[str, bool] = {}
+        # Outlives a missed round before another process takes over.
+        self.lease = Lease(bot, "server_monitor_leader", ttl=int(self.interval * 3))
+        self.probe.change_interval(seconds=self.interval)
+
+    @staticmethod
+    def _key(address: str) -> str:
+        return f"server_status_{address}"
+
+    async def get_snapshot(self, address: str) -> Optional[Dict[str, Any]]:
+        """Latest snapshot for an address, or None if it is not monitored.
+
+        The snapshot holds the ping ``data`` (None when the server was
+        unreachable), ``online`` and ``checked``, a unix timestamp.
+        """
+        raw = await self._bot.redis.get(self._key(normalise_address(address)))
+        return json.loads(raw) if raw is not None else None
+
+    async def _all_servers(self) -> List[str]:
+        rows = await self._bot.db.fetch(
+            "SELECT DISTINCT server FROM guild WHERE server IS NOT NULL"
+        )
+        addresses = {normalise_address(row["server"]) for row in rows}
+        return [address for address in addresses if address]
+
+    async def _linked_servers(self) -> Dict[str, List[int]]:
+        guild_ids = [guild.id for guild in self._bot.guilds]
+        rows = await self._bot.db.fetch(
+            "SELECT id, server FROM guild "
+            "WHERE server IS NOT NULL AND id = ANY($1::bigint[])",
+            guild_ids,
+        )
+        servers = defaultdict(list)
+        for row in rows:
+            address = normalise_address(row["server"])
+            if address:
+                servers[address].append(row["id"])
+        return servers
+
+    async def _ping(
+        self, semaphore: asyncio.Semaphore, address: str
+    ) -> Optional[Dict[str, Any]]:
+        host, port = split_address(address)
+        async with semaphore:
+            try:
+                return await ping_java(host, port)
+            except ServerUnreachable:
+                return None
+            except Exception:
+                log.exception("Unexpected error pinging %s", address)
+                return None
+
+    @tasks.loop(minutes=5)
+    async def probe(self) -> None:
+        """Ping the linked servers if leading, then report any changes."""
+        # An uncaught error would stop the loop for good.
+        try:
+            if await self.lease.acquire():
+                await self.ping_all()
+            await self.check_changes()
+        except Exception:
+            log.exception("Could not probe linked servers")
+
+    async def ping_all(self) -> None:
+        """Ping every server linked by any guild and store the snapshots."""
+        addresses = await self._all_servers()
+        if not addresses:
+            return
+        semaphore = asyncio.Semaphore(self.concurrency)
+        start = time.monotonic()
+        results = await asyncio.gather(
+            *(self._ping(semaphore, address) for address in addresses)
+        )
+
+        checked = time.time()
+        # Keep snapshots around for a few rounds in case a round is missed.
+        expire = self.interval * 3
+        pipe = self._bot.redis.pipeline()
+        for address, data in zip(addresses, results):
+            snapshot = {"data": data, "online": data is not None, "checked": checked}
+            pipe.set(self._key(address), json.dumps(snapshot), expire=expire)
+        await pipe.execute()
+        log.info(
+            "Pinged %s linked servers in %.1fs",
+            len(addresses),
+            time.monotonic() - start,
+        )
+
+    async def check_changes(self) -> None:
+        """Dispatch status changes of the servers this process's guilds link."""
+        servers = await self._linked_servers()
+        online: Dict[str, bool] = {}
+        if servers:
+            snapshots = await self._bot.redis.mget(*map(self._key, servers))
+            for address, raw in zip(servers, snapshots):
+                if raw is None:
+                    continue
+                online[address] = json.loads(raw)["online"]
+                previous = self.online.get(address)
+                if previous is not None and previous != online[address]:
+                    self._bot.dispatch(
+                        "server_status_change",
+                        address,
+                        servers[address],
+                        online[address],
+                    )
+        self.online = online
+
+    @probe.before_loop
+    async def before_probe(self) -> None:
+        await self._bot.wait_until_ready()
@@ -0,0 +1,381 @@
+"""Native Minecraft server list ping for Java and Bedrock Edition."""
+import asyncio
+import ipaddress
+import itertools
+import json
+import logging
+import random
+import re
+import socket
+import struct
+import time
+from typing import Any
+from typing import cast
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import aiodns
+
+log = logging.getLogger("obsidion")
+
+JAVA_PORT = 25565
+
+# Protocol version sent in the handshake, -1 means "whatever you speak".
+HANDSHAKE_PROTOCOL = -1
+
+# Formatting codes such as §a or §l.
+_FORMATTING = re.compile("§.")
+
+_resolver: Optional[aiodns.DNSResolver] = None
+
+
+class ServerUnreachable(Exception):
+    """The server did not answer the ping in time or answered gibberish."""
+
+    pass
+
+
+def pack_varint(value: int) -> bytes:
+    """Encode a VarInt, with negative numbers as 32 bit two's complement."""
+    value &= 0xFFFFFFFF
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def pack_string(value: str) -> bytes:
+    data = value.encode("utf-8")
+    return pack_varint(len(data)) + data
+
+
+def pack_packet(packet_id: int, payload: bytes = b"") -> bytes:
+    """Frame a packet as length, id, payload."""
+    body = pack_varint(packet_id) + payload
+    return pack_varint(len(body)) + body
+
+
+async def read_varint(reader: asyncio.StreamReader) -> int:
+    result = 0
+    for shift in range(0, 35, 7):
+        byte = (await reader.readexactly(1))[0]
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            if result & 0x80000000:
+                result -= 1 << 32
+            return result
+    raise ServerUnreachable("VarInt is too big")
+
+
+def unpack_varint(data: bytes, offset: int = 0) -> Tuple[int, int]:
+    """Decode a VarInt from `data`, returning it and the offset after it."""
+    result = 0
+    for shift in range(0, 35, 7):
+        byte = data[offset]
+        offset += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, offset
+    raise ServerUnreachable("VarInt is too big")
+
+
+def flatten_motd(description: Any) -> str:
+    """Turn a chat component, or a plain string, into raw text."""
+    if isinstance(description, str):
+        return description
+    if isinstance(description, list):
+        return "".join(flatten_motd(part) for part in description)
+    if isinstance(description, dict):
+        extra = description.get("extra", [])
+        return str(description.get("text", "")) + "".join(map(flatten_motd, extra))
+    return ""
+
+
+def clean_motd(raw: str) -> List[str]:
+    """Strip formatting codes and split the MOTD into its lines."""
+    return [line.strip() for line in _FORMATTING.sub("", raw).split("\n")]
+
+
+def _is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+async def resolve_srv(host: str, timeout: float) -> Tuple[str, int]:
+    """Follow a ``_minecraft._tcp`` SRV record, if the host has one."""
+    global _resolver
+    if _resolver is None:
+        _resolver = aiodns.DNSResolver()
+    try:
+        records = await asyncio.wait_for(
+            _resolver.query(f"_minecraft._tcp.{host}", "SRV"), timeout
+        )
+    except (aiodns.error.DNSError, asyncio.TimeoutError):
+        return host, JAVA_PORT
+    record = min(records, key=lambda r: (r.priority, -r.weight))
+    return record.host.rstrip("."), record.port
+
+
+async def _status(host: str, port: int, handshake_host: str) -> Dict[str, Any]:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        handshake = (
+            pack_varint(HANDSHAKE_PROTOCOL)
+            + pack_string(handshake_host)
+            + struct.pack(">H", port)
+            + pack_varint(1)
+        )
+        writer.write(pack_packet(0x00, handshake) + pack_packet(0x00))
+        await writer.drain()
+
+        length = await read_varint(reader)
+        packet = await reader.readexactly(length)
+        packet_id, offset = unpack_varint(packet)
+        if packet_id != 0x00:
+            raise ServerUnreachable(f"Unexpected packet {packet_id}")
+        size, offset = unpack_varint(packet, offset)
+        status = json.loads(packet[offset : offset + size].decode("utf-8"))
+        if not isinstance(status, dict):
+            raise ServerUnreachable("Malformed status")
+
+        # Some servers close the connection instead of answering the ping.
+        start = time.perf_counter()
+        try:
+            writer.write(pack_packet(0x01, struct.pack(">q", int(start))))
+            await writer.drain()
+            length = await read_varint(reader)
+            await reader.readexactly(length)
+        except (OSError, asyncio.IncompleteReadError):
+            status["latency"] = None
+        else:
+            status["latency"] = round((time.perf_counter() - start) * 1000)
+        return status
+    finally:
+        writer.close()
+
+
+async def _legacy_status(host: str, port: int) -> Dict[str, Any]:
+    """Ping a pre-1.7 server, which answers a 0xFE with a kick packet."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(b"\xfe\x01")
+        await writer.drain()
+        if (await reader.readexactly(1)) != b"\xff":
+            raise ServerUnreachable("Not a legacy ping response")
+        (length,) = struct.unpack(">H", await reader.readexactly(2))
+        text = (await reader.readexactly(length * 2)).decode("utf-16-be")
+    finally:
+        writer.close()
+
+    if text.startswith("§1\x00"):
+        _, protocol, version, motd, online, maximum = text.split("\x00")
+    else:
+        # Beta 1.8 to 1.3 only send the MOTD and player counts.
+        motd, online, maximum = text.rsplit("§", 2)
+        protocol, version = "0", "Legacy"
+    return {
+        "description": motd,
+        "players": {"online": int(online), "max": int(maximum)},
+        "version": {"name": version, "protocol": int(protocol)},
+    }
+
+
+async def ping_java(
+    address: str, port: Optional[int] = None, timeout: float = 5.0
+) -> Dict[str, Any]:
+    """Get the status of a Java Edition server.
+
+    Follows SRV records when no port is given and falls back to the legacy
+    ping for servers older than 1.7. The result has the same shape as the
+    Obsidion API's ``/server/java`` endpoint.
+
+    Raises
+    ------
+    ServerUnreachable
+        If the server could not be pinged within `timeout` seconds in total.
+    """
+    # SRV lookup, modern ping and legacy fallback all share one budget.
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+
+    def remaining() -> float:
+        return max(deadline - loop.time(), 0)
+
+    host = address
+    if port is None and not _is_ip(address):
+        host, port = await resolve_srv(address, remaining())
+    port = port or JAVA_PORT
+
+    try:
+        status = await asyncio.wait_for(_status(host, port, address), remaining())
+    except (
+        ConnectionResetError,
+        BrokenPipeError,
+        ServerUnreachable,
+        asyncio.IncompleteReadError,
+        ValueError,
+        IndexError,
+    ):
+        # Servers older than 1.7 hang up on the modern handshake.
+        try:
+            status = await asyncio.wait_for(_legacy_status(host, port), remaining())
+        except (
+            OSError,
+            asyncio.TimeoutError,
+            asyncio.IncompleteReadError,
+            ValueError,
+        ) as e:
+            raise ServerUnreachable(str(e)) from e
+    except (OSError, asyncio.TimeoutError) as e:
+        raise ServerUnreachable(str(e)) from e
+
+    raw = flatten_motd(status.get("description", ""))
+    return {
+        "motd": {"raw": raw, "clean": clean_motd(raw)},
+        "players": {
+            "online": status.get("players", {}).get("online", 0),
+            "max": status.get("players", {}).get("max", 0),
+        },
+        "version": status.get("version", {}).get("name"),
+        "protocol": status.get("version", {}).get("protocol"),
+        "icon": status.get("favicon"),
+        "latency": status.get("latency"),
+    }
+
+
+BEDROCK_PORT = 19132
+
+# Offline message ID every unconnected RakNet packet carries.
+RAKNET_MAGIC = bytes.fromhex("00ffff00fefefefefdfdfdfd12345678")
+
+UNCONNECTED_PING = 0x01
+UNCONNECTED_PONG = 0x1C
+
+_PING = struct.Struct(">Bq16sq")
+_PONG_HEADER = struct.Struct(">Bqq16sH")
+
+
+class BedrockPinger(asyncio.DatagramProtocol):
+    """RakNet unconnected ping client for Bedrock Edition servers.
+
+    Every ping goes out over the same UDP socket. The ping's time field
+    carries a unique ID which the server echoes back, so replies are matched
+    to their waiting request no matter what order they arrive in.
+    """
+
+    def __init__(self) -> None:
+        self.guid = random.getrandbits(63)
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._waiters: Dict[int, "asyncio.Future[str]"] = {}
+        self._ids = itertools.count(1)
+        self._lock = asyncio.Lock()
+
+    async def _ensure_transport(self) -> asyncio.DatagramTransport:
+        async with self._lock:
+            if self._transport is None or self._transport.is_closing():
+                loop = asyncio.get_running_loop()
+                await loop.create_datagram_endpoint(
+                    lambda: self, local_addr=("0.0.0.0", 0)
+                )
+            if self._transport is None:
+                raise ServerUnreachable("Could not open a UDP socket")
+            return self._transport
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self._transport = cast(asyncio.DatagramTransport, transport)
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self._transport = None
+        for waiter in self._waiters.values():
+            if not waiter.done():
+                waiter.set_exception(ServerUnreachable("Socket closed"))
+        self._waiters.clear()
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        if len(data) < _PONG_HEADER.size or data[0] != UNCONNECTED_PONG:
+            return
+        _, ping_id, _, magic, length = _PONG_HEADER.unpack_from(data)
+        if magic != RAKNET_MAGIC:
+            return
+        waiter = self._waiters.get(ping_id)
+        if waiter is not None and not waiter.done():
+            body = data[_PONG_HEADER.size : _PONG_HEADER.size + length]
+            waiter.set_result(body.decode("utf-8", errors="replace"))
+
+    def close(self) -> None:
+        if self._transport is not None:
+            self._transport.close()
+
+    async def ping(
+        self, address: str, port: Optional[int] = None, timeout: float = 5.0
+    ) -> Dict[str, Any]:
+        """Get the status of a Bedrock Edition server.
+
+        Raises
+        ------
+        ServerUnreachable
+            If the server did not answer within `timeout` seconds.
+        """
+        loop = asyncio.get_running_loop()
+        port = port or BEDROCK_PORT
+        try:
+            infos = await asyncio.wait_for(
+                loop.getaddrinfo(
+                    address, port, family=socket.AF_INET, type=socket.SOCK_DGRAM
+                ),
+                timeout,
+            )
+        except (OSError, asyncio.TimeoutError) as e:
+            raise ServerUnreachable(str(e)) from e
+        transport = await self._ensure_transport()
+
+        ping_id = next(self._ids)
+        waiter: "asyncio.Future[str]" = loop.create_future()
+        self._waiters[ping_id] = waiter
+        start = time.perf_counter()
+        try:
+            transport.sendto(
+                _PING.pack(UNCONNECTED_PING, ping_id, RAKNET_MAGIC, self.guid),
+                infos[0][4],
+            )
+            text = await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError as e:
+            raise ServerUnreachable(f"{address}:{port} did not answer") from e
+        finally:
+            self._waiters.pop(ping_id, None)
+        latency = round((time.perf_counter() - start) * 1000)
+        return parse_bedrock_status(text, latency)
+
+
+def parse_bedrock_status(text: str, latency: Optional[int] = None) -> Dict[str, Any]:
+    """Parse the ``MCPE;motd;protocol;version;online;max;...`` pong string."""
+    fields = text.split(";")
+    if len(fields) < 6:
+        raise ServerUnreachable("Malformed pong")
+    raw = fields[1]
+    if len(fields) > 7 and fields[7]:
+        raw += "\n" + fields[7]
+    try:
+        online, maximum, protocol = int(fields[4]), int(fields[5]), int(fields[2])
+    except ValueError as e:
+        raise ServerUnreachable("Malformed pong") from e
+    return {
+        "motd": {"raw": raw, "clean": clean_motd(raw)},
+        "players": {"online": online, "max": maximum},
+        "version": fields[3],
+        "protocol": protocol,
+        "edition": fields[0],
+        "gamemode": fields[8] if len(fields) > 8 else None,
+        "icon": None,
+        "latency": latency,
+    }
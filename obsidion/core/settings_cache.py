@@ -1,12 +1,367 @@
+import asyncio
 import json
+import logging
+import time
+import uuid as _uuid
+from collections import OrderedDict
+from dataclasses import asdict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+from typing import Awaitable
+from typing import Callable
 from typing import Dict
+from typing import FrozenSet
+from typing import Iterable
 from typing import List
 from typing import Optional
+from typing import Set
+from typing import Tuple
 from typing import Union
 from uuid import UUID
+
+import aioredis
 import discord
 
 from .config import get_settings
+from .utils.utils import divide_array
+
+log = logging.getLogger("obsidion")
+
+# Redis pub/sub channel used to tell every process that a cached key changed.
+INVALIDATION_CHANNEL = "obsidion:settings:invalidate"
+
+# Unique id for this process so it can ignore its own invalidation messages.
+PROCESS_ID = _uuid.uuid4().hex
+
+MISSING = object()
+
+# Redis sets of the channels subscribed to each news category, and the key
+# marking that they have been built from the database.
+NEWS_INDEX = "news_subscribers:{category}"
+NEWS_INDEX_BUILT = "news_subscribers"
+
+# Columns of the guild table that make up a guild's settings.
+GUILD_COLUMNS = ("prefix", "locale", "regional", "server", "news")
+
+RCON_COLUMNS = ("server", "password", "port", "roles", "channel")
+
+
+@lru_cache(maxsize=None)
+def upsert_query(table: str, columns: Tuple[str, ...]) -> str:
+    """Build an ``INSERT ... ON CONFLICT (id) DO UPDATE`` statement.
+
+    The text for a given table and set of columns is always identical, so
+    asyncpg keeps it in each connection's prepared statement cache.
+    """
+    names = ", ".join(columns)
+    placeholders = ", ".join(f"${i}" for i in range(2, len(columns) + 2))
+    updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in columns)
+    return (
+        f"INSERT INTO {table} (id, {names}) VALUES ($1, {placeholders}) "  # noqa: S608
+        f"ON CONFLICT (id) DO UPDATE SET {updates} RETURNING *"
+    )
+
+
+async def upsert(bot, table: str, _id: int, **columns: Any) -> Any:
+    """Insert or update a row in a single statement and return the new row."""
+    return await bot.db.fetchrow(
+        upsert_query(table, tuple(columns)), _id, *columns.values()
+    )
+
+
+@dataclass(frozen=True)
+class GuildSettings:
+    """Every stored setting of a guild, loaded from a single row."""
+
+    id: int
+    prefix: Optional[str] = None
+    locale: Optional[str] = None
+    regional: Optional[str] = None
+    server: Optional[str] = None
+    news: Optional[Dict[str, Optional[int]]] = None
+
+    @classmethod
+    def from_record(cls, gid: int, record: Optional[Any]) -> "GuildSettings":
+        """Build settings from a guild row, or defaults if there is none."""
+        if record is None:
+            return cls(id=gid)
+        return cls(
+            id=gid,
+            prefix=record["prefix"],
+            locale=record["locale"],
+            regional=record["regional"],
+            server=record["server"],
+            news=json.loads(record["news"]) if record["news"] else None,
+        )
+
+
+class LocalCache:
+    """In-process LRU cache with a time to live, sitting in front of Redis."""
+
+    def __init__(self, maxsize: int = 50000, ttl: float = 300.0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Any:
+        """Get a value from the cache or `MISSING` if absent or expired."""
+        try:
+            expires, value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return MISSING
+        if expires < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return MISSING
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entry when full."""
+        ttl = self.ttl if ttl is None else ttl
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: str) -> None:
+        """Drop a single key from the cache."""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every key from the cache."""
+        self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit, miss and eviction counters for the cache."""
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class KnownDefaults:
+    """Compact in-memory record of ids known to have no stored settings.
+
+    Keys are split into a namespace and an integer id, e.g. ``guild_1234``,
+    so each namespace is a plain set of ints. Rather than expiring ids one
+    by one, the whole record is dropped once it is `ttl` seconds old, in
+    case an invalidation for one of them was missed.
+    """
+
+    def __init__(self, ttl: float = 86400.0) -> None:
+        self.ttl = ttl
+        self._ids: Dict[str, Set[int]] = {}
+        self._started = time.monotonic()
+
+    @staticmethod
+    def _split(key: str) -> Optional[Tuple[str, int]]:
+        """Namespace and id of a key, or None for keys without a numeric id."""
+        namespace, _, _id = key.rpartition("_")
+        if not _id.isdigit():
+            return None
+        return namespace, int(_id)
+
+    def __contains__(self, key: str) -> bool:
+        if time.monotonic() - self._started > self.ttl:
+            self.clear()
+        split = self._split(key)
+        if split is None:
+            return False
+        namespace, _id = split
+        return _id in self._ids.get(namespace, ())
+
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self._ids.values())
+
+    def add(self, key: str) -> None:
+        split = self._split(key)
+        if split is not None:
+            namespace, _id = split
+            self._ids.setdefault(namespace, set()).add(_id)
+
+    def discard(self, key: str) -> None:
+        split = self._split(key)
+        if split is not None:
+            namespace, _id = split
+            self._ids.get(namespace, set()).discard(_id)
+
+    def clear(self) -> None:
+        self._ids.clear()
+        self._started = time.monotonic()
+
+
+# Fetch a key and refresh its expiry in one call. Entries matching the
+# default value (ARGV[3]) are negative entries and keep their own expiry.
+_GET_AND_TOUCH = """
+local value = redis.call('GET', KEYS[1])
+if value then
+    if value == ARGV[3] then
+        redis.call('EXPIRE', KEYS[1], ARGV[2])
+    else
+        redis.call('EXPIRE', KEYS[1], ARGV[1])
+    end
+end
+return value
+"""
+
+
+class CacheBackend:
+    """Read-through/write-through cache shared by the settings managers.
+
+    Lookups go to the local cache first, then to Redis where the value is
+    fetched and its expiry refreshed in a single script call. Only a miss in
+    both tiers calls the loader and writes the result back.
+    Values are stored JSON encoded, so ``None`` is a cacheable value.
+
+    When a lookup passes a ``default``, results equal to it are negative
+    entries: they are stored with ``negative_expire`` and the id is kept in
+    `KnownDefaults` so it never reaches the database again, even after a
+    Redis flush, until a setter changes it.
+    """
+
+    def __init__(
+        self, bot, expire: int = 28800, negative_expire: int = 86400
+    ) -> None:
+        self._bot = bot
+        self.expire = expire
+        self.negative_expire = negative_expire
+        self.local = LocalCache()
+        self.known_defaults = KnownDefaults(ttl=negative_expire)
+
+    async def get(self, key: str, default: Any = MISSING) -> Any:
+        """Get a value from the local cache or Redis, `MISSING` if neither has it."""
+        value = self.local.get(key)
+        if value is not MISSING:
+            return value
+        if default is not MISSING and key in self.known_defaults:
+            return default
+        negative = "" if default is MISSING else json.dumps(default)
+        raw = await self._bot.redis.eval(
+            _GET_AND_TOUCH,
+            keys=[key],
+            args=[self.expire, self.negative_expire, negative],
+        )
+        if raw is None:
+            return MISSING
+        value = json.loads(raw)
+        self.local.set(key, value)
+        return value
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        default: Any = MISSING,
+    ) -> Any:
+        """Get a value, calling `loader` and caching its result on a miss."""
+        value = await self.get(key, default)
+        if value is MISSING:
+            value = await loader()
+            expire = self.negative_expire if value == default else self.expire
+            await self._bot.redis.set(key, json.dumps(value), expire=expire)
+            self.local.set(key, value)
+        if default is not MISSING and value == default:
+            self.known_defaults.add(key)
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        """Write a new value through both tiers and notify other processes."""
+        pipe = self._bot.redis.pipeline()
+        pipe.set(key, json.dumps(value), expire=self.expire)
+        pipe.publish(INVALIDATION_CHANNEL, f"{PROCESS_ID}:{key}")
+        await pipe.execute()
+        self.known_defaults.discard(key)
+        self.local.set(key, value)
+
+    async def set_many(
+        self, items: Dict[str, Any], negative: Iterable[str] = ()
+    ) -> None:
+        """Cache freshly loaded values in one pipelined round trip.
+
+        Keys in `negative` are stored as negative entries. Keys that are
+        already cached are left alone, since they were either loaded just as
+        recently or written by an update made after these values were read.
+        Unlike `set` this does not notify other processes, as the values come
+        straight from the database rather than from a change.
+        """
+        negative = set(negative)
+        pipe = self._bot.redis.pipeline()
+        for key, value in items.items():
+            pipe.set(
+                key,
+                json.dumps(value),
+                expire=self.negative_expire if key in negative else self.expire,
+                exist=self._bot.redis.SET_IF_NOT_EXIST,
+            )
+        written = await pipe.execute()
+        for (key, value), ok in zip(items.items(), written):
+            if not ok:
+                continue
+            if key in negative:
+                self.known_defaults.add(key)
+            else:
+                self.known_defaults.discard(key)
+            self.local.set(key, value)
+
+    async def invalidate_everywhere(self, *keys: str) -> None:
+        """Drop keys from the local cache of every process, this one included."""
+        pipe = self._bot.redis.pipeline()
+        for key in keys:
+            pipe.publish(INVALIDATION_CHANNEL, f"{PROCESS_ID}:{key}")
+            self.invalidate(key)
+        await pipe.execute()
+
+    def invalidate(self, key: str) -> None:
+        """Forget everything this process knows about `key`."""
+        self.local.invalidate(key)
+        self.known_defaults.discard(key)
+
+    def clear(self) -> None:
+        """Forget everything this process has cached."""
+        self.local.clear()
+        self.known_defaults.clear()
+
+
+async def listen_for_invalidations(bot) -> None:
+    """Drop local cache entries whenever another process changes a setting.
+
+    Pub/sub needs a dedicated connection, so this does not use the bot pool.
+    The local cache is cleared whenever a subscription starts, as
+    invalidations may have been missed while there was none.
+    """
+    backend = bot._cache_backend
+    while True:
+        try:
+            conn = await aioredis.create_redis(str(get_settings().REDIS))
+            try:
+                (channel,) = await conn.subscribe(INVALIDATION_CHANNEL)
+                # Anything cached before now may have missed an invalidation.
+                backend.clear()
+                async for message in channel.iter(encoding="utf-8"):
+                    origin, _, key = message.partition(":")
+                    if origin != PROCESS_ID:
+                        backend.invalidate(key)
+            finally:
+                conn.close()
+                await conn.wait_closed()
+        except asyncio.CancelledError:
+            raise
+        except (aioredis.RedisError, OSError):
+            log.warning("Lost settings invalidation channel, reconnecting")
+        await asyncio.sleep(5)
 
 
 class PrefixManager:
@@ -14,46 +369,18 @@ class PrefixManager:
         self._bot = bot
 
     async def get_prefixes(self, guild: Optional[discord.Guild] = None) -> List[str]:
-        gid: Optional[int] = guild.id if guild else None
-        if gid is None:
+        if guild is None:
             return [get_settings().DEFAULT_PREFIX]
 
-        key = f"prefix_{gid}"
-        redis = await self._bot.redis.exists(key)
-        if redis:
-            prefix = (await self._bot.redis.get(key)).decode("UTF-8")
-        else:
-            db_prefix = await self._bot.db.fetchval(
-                "SELECT prefix FROM guild WHERE id = $1", gid
-            )
-            if db_prefix:
-                prefix = db_prefix
-            else:
-                prefix = get_settings().DEFAULT_PREFIX
-        await self._bot.redis.set(key, prefix, expire=28800)
-        return [str(prefix)]
+        settings = await self._bot._guild_cache.get_settings(guild)
+        return [str(settings.prefix or get_settings().DEFAULT_PREFIX)]
 
     async def set_prefixes(
         self,
         guild: discord.Guild,
         prefix: Optional[str] = None,
     ):
-        gid = guild.id
-
-        key = f"prefix_{gid}"
-        if prefix is None:
-            prefix = get_settings().DEFAULT_PREFIX
-        elif await self._bot.db.fetch("SELECT prefix FROM guild WHERE id = $1", gid):
-            await self._bot.db.execute(
-                "UPDATE guild SET prefix = $1 WHERE id = $2", prefix, gid
-            )
-        else:
-            await self._bot.db.execute(
-                "INSERT INTO guild (id, prefix) VALUES ($1, $2)",
-                gid,
-                prefix,
-            )
-        await self._bot.redis.set(key, prefix, expire=28800)
+        await self._bot._guild_cache.update(guild, prefix=prefix)
 
 
 class I18nManager:
@@ -64,39 +391,12 @@ class I18nManager:
         """Get the guild locale from the cache"""
         if not guild:
             return "en-US"
-        gid = guild.id
-        key = f"locale_{gid}"
-        redis = await self._bot.redis.exists(key)
-        if redis:
-            locale = (await self._bot.redis.get(key)).decode("UTF-8")
-        else:
-            db_locale = await self._bot.db.fetchval(
-                "SELECT locale FROM guild WHERE id = $1", gid
-            )
-            if db_locale:
-                locale = db_locale
-            else:
-                locale = "en-US"
-        await self._bot.redis.set(key, locale, expire=28800)
-
-        return locale
+        settings = await self._bot._guild_cache.get_settings(guild)
+        return settings.locale or "en-US"
 
     async def set_locale(self, guild: discord.Guild, locale: Union[str, None]) -> None:
         """Set the locale in the config and cache"""
-        gid = guild.id
-
-        key = f"locale_{gid}"
-        if await self._bot.db.fetch("SELECT locale FROM guild WHERE id = $1", gid):
-            await self._bot.db.execute(
-                "UPDATE guild SET locale = $1 WHERE id = $2", locale, gid
-            )
-        else:
-            await self._bot.db.execute(
-                "INSERT INTO guild (id, locale) VALUES ($1, $2)",
-                gid,
-                locale,
-            )
-        await self._bot.redis.set(key, locale, expire=28800)
+        await self._bot._guild_cache.update(guild, locale=locale)
 
     async def get_regional_format(
         self, guild: Union[discord.Guild, None]
@@ -104,179 +404,175 @@ class I18nManager:
         """Get the regional format from the cache"""
         if not guild:
             return "en-US"
-        gid = guild.id
-        key = f"regional_{gid}"
-        redis = await self._bot.redis.exists(key)
-        if redis:
-            regional = (await self._bot.redis.get(key)).decode("UTF-8")
-        else:
-            db_regional = await self._bot.db.fetchval(
-                "SELECT regional FROM guild WHERE id = $1", gid
-            )
-            if db_regional:
-                regional = db_regional
-            else:
-                regional = "en-US"
-        await self._bot.redis.set(key, regional, expire=28800)
-
-        return regional
+        settings = await self._bot._guild_cache.get_settings(guild)
+        return settings.regional or "en-US"
 
     async def set_regional_format(
         self, guild: Union[discord.Guild, None], regional_format: Union[str, None]
     ) -> None:
         """Set the regional format in the config and cache"""
-        gid = guild.id
-
-        key = f"regional_{gid}"
-        if await self._bot.db.fetch("SELECT regional FROM guild WHERE id = $1", gid):
-            await self._bot.db.execute(
-                "UPDATE guild SET regional = $1 WHERE id = $2", regional_format, gid
-            )
-        else:
-            await self._bot.db.execute(
-                "INSERT INTO guild (id, regional) VALUES ($1, $2)",
-                gid,
-                regional_format,
-            )
-        await self._bot.redis.set(key, regional_format, expire=28800)
+        await self._bot._guild_cache.update(guild, regional=regional_format)
 
 
 class AccountManager:
     def __init__(self, bot):
         self._bot = bot
+        self._backend: CacheBackend = bot._cache_backend
 
     async def get_account(self, user: discord.User) -> Union[UUID, None]:
         uid = user.id
-        key = f"account_{uid}"
-        redis = await self._bot.redis.exists(key)
-        if redis:
-            uuid = json.loads(await self._bot.redis.get(key))
-            if uuid == "None":
-                uuid = None
-            if uuid is not None:
-                uuid = UUID(uuid)
-        else:
+
+        async def load() -> Optional[str]:
             uuid = await self._bot.db.fetchval(
                 "SELECT uuid FROM account WHERE id = $1", uid
             )
-        await self._bot.redis.set(key, json.dumps(str(uuid)), expire=28800)
-        return uuid
+            return str(uuid) if uuid else None
+
+        uuid = await self._backend.get_or_load(f"account_{uid}", load, default=None)
+        # Entries written before negative caching hold the string "None".
+        return UUID(uuid) if uuid and uuid != "None" else None
 
     async def set_account(
         self, user: discord.User, uuid: Optional[UUID] = None
     ) -> None:
         uid = user.id
-        key = f"account_{uid}"
-        if await self._bot.db.fetch("SELECT uuid FROM account WHERE id = $1", uid):
-            await self._bot.db.execute(
-                "UPDATE account SET uuid = $1 WHERE id = $2",
-                uuid,
-                uid,
-            )
-        else:
-            await self._bot.db.execute(
-                "INSERT INTO account (id, uuid) VALUES ($1, $2)",
-                uid,
-                uuid,
-            )
-        await self._bot.redis.set(key, json.dumps(uuid), expire=28800)
+        await upsert(self._bot, "account", uid, uuid=str(uuid) if uuid else None)
+        await self._backend.set(f"account_{uid}", str(uuid) if uuid else None)
 
 
 class GuildManager:
     def __init__(self, bot):
         self._bot = bot
+        self._backend: CacheBackend = bot._cache_backend
 
-    async def get_server(self, guild: discord.Guild) -> Union[str, None]:
+    async def _load(self, gid: int) -> Dict[str, Any]:
+        record = await self._bot.db.fetchrow("SELECT * FROM guild WHERE id = $1", gid)
+        return asdict(GuildSettings.from_record(gid, record))
+
+    async def get_settings(self, guild: discord.Guild) -> GuildSettings:
+        """Get every stored setting for a guild with a single cache lookup."""
         gid = guild.id
-        key = f"server_{gid}"
-        redis = await self._bot.redis.exists(key)
-        if redis:
-            server = json.loads((await self._bot.redis.get(key)).decode("UTF-8"))
-        else:
-            server = await self._bot.db.fetchval(
-                "SELECT server FROM guild WHERE id = $1", gid
+        data = await self._backend.get_or_load(
+            f"guild_{gid}",
+            lambda: self._load(gid),
+            default=asdict(GuildSettings(id=gid)),
+        )
+        return GuildSettings(**data)
+
+    async def warm(self, guild_ids: List[int], batch_size: int = 1000) -> None:
+        """Load and cache the settings of many guilds with bulk queries."""
+        for batch in divide_array(guild_ids, batch_size):
+            records = await self._bot.db.fetch(
+                "SELECT * FROM guild WHERE id = ANY($1::bigint[])", batch
             )
-        await self._bot.redis.set(key, json.dumps(server), expire=28800)
-        return server
+            found = {record["id"]: record for record in records}
+            items = {
+                f"guild_{gid}": asdict(GuildSettings.from_record(gid, found.get(gid)))
+                for gid in batch
+            }
+            negative = [f"guild_{gid}" for gid in batch if gid not in found]
+            await self._backend.set_many(items, negative)
+
+    async def update(self, guild: discord.Guild, **columns: Any) -> GuildSettings:
+        """Update one or more guild columns and the cached record together."""
+        gid = guild.id
+        for column in columns:
+            if column not in GUILD_COLUMNS:
+                raise ValueError(f"Unknown guild setting {column!r}")
+        if "news" in columns:
+            columns["news"] = json.dumps(columns["news"])
+
+        record = await upsert(self._bot, "guild", gid, **columns)
+        data = asdict(GuildSettings.from_record(gid, record))
+        await self._backend.set(f"guild_{gid}", data)
+        return GuildSettings(**data)
+
+    async def get_server(self, guild: discord.Guild) -> Union[str, None]:
+        return (await self.get_settings(guild)).server
 
     async def set_server(
         self, guild: discord.Guild, server: Optional[str] = None
     ) -> Union[str, None]:
-        gid = guild.id
-        key = f"server_{gid}"
-        if await self._bot.db.fetch("SELECT server FROM guild WHERE id = $1", gid):
-            await self._bot.db.execute(
-                "UPDATE guild SET server = $1 WHERE id = $2",
-                server,
-                gid,
-            )
-        else:
-            await self._bot.db.execute(
-                "INSERT INTO guild (id, server) VALUES ($1, $2)",
-                gid,
-                server,
-            )
-        await self._bot.redis.set(key, json.dumps(server), expire=28800)
+        await self.update(guild, server=server)
 
     async def get_news(self, guild: discord.Guild) -> Union[Dict[str, str], None]:
-        gid = guild.id
-        key = f"news_{gid}"
-        redis = await self._bot.redis.exists(key)
-        if redis:
-            server = json.loads((await self._bot.redis.get(key)))
-        else:
-            server = json.loads(
-                await self._bot.db.fetchval("SELECT news FROM guild WHERE id = $1", gid)
-            )
-        await self._bot.redis.set(key, json.dumps(server), expire=28800)
-        return server
+        return (await self.get_settings(guild)).news
 
     async def set_news(self, guild: discord.Guild, news: json = None) -> None:
-        gid = guild.id
-        str_news = json.dumps(news)
-        key = f"news_{gid}"
-        if await self._bot.db.fetch("SELECT news FROM guild WHERE id = $1", gid):
-            await self._bot.db.execute(
-                "UPDATE guild SET news = $1 WHERE id = $2",
-                str_news,
-                gid,
-            )
-        else:
-            await self._bot.db.execute(
-                "INSERT INTO guild (id, news) VALUES ($1, $2)",
-                gid,
-                str_news,
-            )
-        await self._bot.redis.set(key, str_news, expire=28800)
+        old = await self.get_news(guild) or {}
+        await self.update(guild, news=news)
+        await self._index_news(old, news or {})
+
+    async def _index_news(
+        self, old: Dict[str, Optional[int]], new: Dict[str, Optional[int]]
+    ) -> None:
+        """Move a guild's channels between the news subscriber sets."""
+        changed = [
+            category
+            for category in set(old) | set(new)
+            if old.get(category) != new.get(category)
+        ]
+        if not changed:
+            return
+        pipe = self._bot.redis.pipeline()
+        for category in changed:
+            key = NEWS_INDEX.format(category=category)
+            if old.get(category) is not None:
+                pipe.srem(key, old[category])
+            if new.get(category) is not None:
+                pipe.sadd(key, new[category])
+        await pipe.execute()
+        await self._backend.invalidate_everywhere(
+            *(NEWS_INDEX.format(category=category) for category in changed)
+        )
+
+    async def _build_news_index(self) -> None:
+        """Fill the subscriber sets from the database if Redis lost them."""
+        if await self._bot.redis.exists(NEWS_INDEX_BUILT):
+            return
+        records = await self._bot.db.fetch(
+            "SELECT news FROM guild WHERE news IS NOT NULL"
+        )
+        pipe = self._bot.redis.pipeline()
+        for record in records:
+            for category, channel in (json.loads(record["news"]) or {}).items():
+                if channel is not None:
+                    pipe.sadd(NEWS_INDEX.format(category=category), channel)
+        pipe.set(NEWS_INDEX_BUILT, 1)
+        await pipe.execute()
+
+    async def news_subscribers(self, category: str) -> FrozenSet[int]:
+        """Ids of every channel subscribed to a news category."""
+        key = NEWS_INDEX.format(category=category)
+        channels = self._backend.local.get(key)
+        if channels is MISSING:
+            await self._build_news_index()
+            members = await self._bot.redis.smembers(key, encoding="utf-8")
+            channels = frozenset(int(channel) for channel in members)
+            self._backend.local.set(key, channels)
+        return channels
 
 
 class RconManager:
     def __init__(self, bot):
         self._bot = bot
+        self._backend: CacheBackend = bot._cache_backend
 
     async def get_rcon(
         self, guild: discord.Guild
     ) -> Union[Dict[str, Union[str, int]], None]:
         """Get rcon data."""
         gid = guild.id
-        key = f"rcon_{gid}"
-        redis = await self._bot.redis.exists(key)
-        if redis:
-            rcon = json.load((await self._bot.redis.get(key)).decode("UTF-8"))
-        else:
+
+        async def load() -> Optional[Dict[str, Union[str, int]]]:
             rcon_details = await self._bot.db.fetchrow(
                 "SELECT * FROM rcon WHERE id = $1", gid
             )
-            rcon = {
-                "server": rcon_details.get("server"),
-                "password": rcon_details.get("password"),
-                "port": rcon_details.get("port"),
-                "roles": rcon_details.get("roles"),
-                "channel": rcon_details.get("channel"),
-            }
+            if rcon_details is None:
+                return None
+            return {column: rcon_details[column] for column in RCON_COLUMNS}
 
-        await self._bot.redis.set(key, json.dump(rcon), expire=28800)
-        return rcon
+        return await self._backend.get_or_load(f"rcon_{gid}", load, default=None)
 
     async def set_rcon(
         self,
@@ -289,33 +585,12 @@ class RconManager:
     ) -> None:
         """Set rcon."""
         gid = guild.id
-
-        key = f"rcon_{gid}"
-        if await self._bot.db.fetch("SELECT * FROM rcon WHERE id = $1", gid):
-            await self._bot.db.execute(
-                "UPDATE rcon SET server = $1, password = $2, port = $3, roles = $4, channel = $5 WHERE id = $6",
-                server,
-                password,
-                port,
-                roles,
-                channel,
-                gid,
-            )
-        else:
-            await self._bot.db.execute(
-                "INSERT INTO guild (id, server, password, port, roles, channel) VALUES ($1, $2, $3, $4, $5,$6)",
-                gid,
-                server,
-                password,
-                port,
-                roles,
-                channel,
-            )
         rcon = {
-            "server": server, 
+            "server": server,
             "password": password,
             "port": port,
             "roles": roles,
             "channel": channel,
         }
-        await self._bot.redis.set(key, json.dump(rcon), expire=28800)
+        await upsert(self._bot, "rcon", gid, **rcon)
+        await self._backend.set(f"rcon_{gid}", rcon)
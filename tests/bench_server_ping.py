@@ -0,0 +1,54 @@
+"""Benchmark the native Java server list ping against a local fake server.
+
+Run with ``python -m tests.bench_server_ping [--pings N] [--concurrency N]``.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+from obsidion.core.server_ping import ping_java
+
+from .test_server_ping import modern_server
+from .test_server_ping import serve
+
+
+async def bench(pings: int, concurrency: int) -> None:
+    server, port = await serve(modern_server)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await ping_java("127.0.0.1", port)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(pings)))
+        elapsed = time.perf_counter() - start
+    finally:
+        server.close()
+        await server.wait_closed()
+
+    latencies.sort()
+    print(f"{pings} pings, {concurrency} at a time, in {elapsed:.2f}s")
+    print(f"{pings / elapsed:.0f} pings/s")
+    print(
+        f"median {statistics.median(latencies):.2f}ms, "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1]:.2f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pings", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(bench(args.pings, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
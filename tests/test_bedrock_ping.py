@@ -0,0 +1,87 @@
+"""Tests for the Bedrock RakNet ping against a fake server."""
+import asyncio
+from typing import Any
+from typing import cast
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+from obsidion.core.server_ping import _PING
+from obsidion.core.server_ping import _PONG_HEADER
+from obsidion.core.server_ping import BedrockPinger
+from obsidion.core.server_ping import RAKNET_MAGIC
+from obsidion.core.server_ping import ServerUnreachable
+from obsidion.core.server_ping import UNCONNECTED_PING
+from obsidion.core.server_ping import UNCONNECTED_PONG
+
+
+class FakeBedrockServer(asyncio.DatagramProtocol):
+    pong = "MCPE;Bedrock server;440;1.17.0;2;10;123;Second line;Survival;1"
+
+    def __init__(self) -> None:
+        self.transport: Optional[asyncio.DatagramTransport] = None
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = cast(asyncio.DatagramTransport, transport)
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        packet_id, ping_id, magic, _ = _PING.unpack(data)
+        assert packet_id == UNCONNECTED_PING and magic == RAKNET_MAGIC
+        body = self.pong.encode("utf-8")
+        header = _PONG_HEADER.pack(
+            UNCONNECTED_PONG, ping_id, 1234, RAKNET_MAGIC, len(body)
+        )
+        assert self.transport is not None
+        self.transport.sendto(header + body, addr)
+
+
+def test_bedrock_ping() -> None:
+    async def run() -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            FakeBedrockServer, local_addr=("127.0.0.1", 0)
+        )
+        pinger = BedrockPinger()
+        try:
+            port = transport.get_extra_info("sockname")[1]
+            return await pinger.ping("127.0.0.1", port, timeout=2)
+        finally:
+            pinger.close()
+            transport.close()
+
+    status = asyncio.run(run())
+    assert status["motd"]["clean"] == ["Bedrock server", "Second line"]
+    assert status["players"] == {"online": 2, "max": 10}
+    assert status["version"] == "1.17.0"
+    assert status["protocol"] == 440
+    assert status["gamemode"] == "Survival"
+
+
+def test_bedrock_pings_share_one_socket() -> None:
+    async def run() -> Tuple[int, int]:
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            FakeBedrockServer, local_addr=("127.0.0.1", 0)
+        )
+        # Bound but silent, so pings to it time out.
+        silent, _ = await loop.create_datagram_endpoint(
+            asyncio.DatagramProtocol, local_addr=("127.0.0.1", 0)
+        )
+        pinger = BedrockPinger()
+        try:
+            port = transport.get_extra_info("sockname")[1]
+            silent_port = silent.get_extra_info("sockname")[1]
+            results = await asyncio.gather(
+                *(pinger.ping("127.0.0.1", port, timeout=2) for _ in range(50)),
+                pinger.ping("127.0.0.1", silent_port, timeout=0.2),
+                return_exceptions=True,
+            )
+        finally:
+            pinger.close()
+            transport.close()
+            silent.close()
+        answered = sum(isinstance(result, dict) for result in results)
+        unreachable = sum(isinstance(result, ServerUnreachable) for result in results)
+        return answered, unreachable
+
+    assert asyncio.run(run()) == (50, 1)
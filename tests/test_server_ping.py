@@ -0,0 +1,115 @@
+"""Tests for the native Java server list ping against fake servers."""
+import asyncio
+import json
+import socket
+import struct
+import time
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Tuple
+
+import pytest
+from obsidion.core.server_ping import pack_packet
+from obsidion.core.server_ping import pack_string
+from obsidion.core.server_ping import pack_varint
+from obsidion.core.server_ping import ping_java
+from obsidion.core.server_ping import read_varint
+from obsidion.core.server_ping import ServerUnreachable
+
+Handler = Callable[[asyncio.StreamReader, asyncio.StreamWriter], Awaitable[None]]
+
+STATUS = {
+    "version": {"name": "1.16.5", "protocol": 754},
+    "players": {"online": 3, "max": 20},
+    "description": {"text": "§aHello", "extra": [{"text": "\nWorld"}]},
+    "favicon": "data:image/png;base64,AAAA",
+}
+
+
+async def serve(handler: Handler) -> Tuple[asyncio.AbstractServer, int]:
+    server = await asyncio.start_server(handler, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+async def modern_server(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+) -> None:
+    # Handshake, then status request.
+    for _ in range(2):
+        await reader.readexactly(await read_varint(reader))
+    writer.write(pack_packet(0x00, pack_string(json.dumps(STATUS))))
+    # Echo the ping back as the pong.
+    length = await read_varint(reader)
+    writer.write(pack_varint(length) + await reader.readexactly(length))
+    await writer.drain()
+    writer.close()
+
+
+def legacy_server(reset: bool) -> Handler:
+    async def handler(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        if await reader.readexactly(1) != b"\xfe":
+            if reset:
+                sock = writer.get_extra_info("socket")
+                sock.setsockopt(
+                    socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0)
+                )
+            writer.close()
+            return
+        text = "§1\x0047\x001.4.7\x00A legacy server\x005\x0010"
+        writer.write(
+            b"\xff" + struct.pack(">H", len(text)) + text.encode("utf-16-be")
+        )
+        await writer.drain()
+        writer.close()
+
+    return handler
+
+
+async def ping(handler: Handler, timeout: float = 5.0) -> Dict[str, Any]:
+    server, port = await serve(handler)
+    try:
+        return await ping_java("127.0.0.1", port, timeout=timeout)
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+def test_ping_java_modern() -> None:
+    status = asyncio.run(ping(modern_server))
+    assert status["motd"] == {"raw": "§aHello\nWorld", "clean": ["Hello", "World"]}
+    assert status["players"] == {"online": 3, "max": 20}
+    assert status["version"] == "1.16.5"
+    assert status["protocol"] == 754
+    assert status["icon"] == STATUS["favicon"]
+    assert status["latency"] is not None
+
+
+@pytest.mark.parametrize("reset", [False, True])
+def test_ping_java_falls_back_to_legacy(reset: bool) -> None:
+    status = asyncio.run(ping(legacy_server(reset)))
+    assert status["motd"]["raw"] == "A legacy server"
+    assert status["players"] == {"online": 5, "max": 10}
+    assert status["version"] == "1.4.7"
+    assert status["protocol"] == 47
+
+
+def test_ping_java_shares_one_deadline() -> None:
+    async def slow_server(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        # Hang up on the modern ping late, then never answer the legacy one.
+        if await reader.readexactly(1) != b"\xfe":
+            await asyncio.sleep(0.3)
+            writer.close()
+            return
+        await asyncio.sleep(10)
+
+    start = time.monotonic()
+    with pytest.raises(ServerUnreachable):
+        asyncio.run(ping(slow_server, timeout=0.5))
+    assert time.monotonic() - start < 0.8
+
@@ -0,0 +1,71 @@
+"""Tests for the settings cache."""
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+from typing import List
+from typing import Tuple
+
+from obsidion.core.settings_cache import CacheBackend
+from obsidion.core.settings_cache import INVALIDATION_CHANNEL
+from obsidion.core.settings_cache import KnownDefaults
+from obsidion.core.settings_cache import MISSING
+from obsidion.core.settings_cache import NEWS_INDEX
+from obsidion.core.settings_cache import PROCESS_ID
+
+
+class FakePipeline:
+    def __init__(self, published: List[Tuple[str, str]]) -> None:
+        self.published = published
+
+    def publish(self, channel: str, message: str) -> None:
+        self.published.append((channel, message))
+
+    async def execute(self) -> List[Any]:
+        return []
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.published: List[Tuple[str, str]] = []
+
+    def pipeline(self) -> FakePipeline:
+        return FakePipeline(self.published)
+
+
+def test_known_defaults() -> None:
+    known = KnownDefaults()
+    known.add("guild_1234")
+    assert "guild_1234" in known
+    assert "guild_4321" not in known
+    assert "account_1234" not in known
+    known.discard("guild_1234")
+    assert "guild_1234" not in known
+    assert len(known) == 0
+
+
+def test_known_defaults_ignores_keys_without_an_id() -> None:
+    known = KnownDefaults()
+    key = NEWS_INDEX.format(category="release")
+    known.add(key)
+    known.discard(key)
+    assert key not in known
+    assert len(known) == 0
+
+
+def test_known_defaults_expire() -> None:
+    known = KnownDefaults(ttl=60)
+    known.add("guild_1234")
+    known._started -= 61
+    assert "guild_1234" not in known
+
+
+def test_invalidate_everywhere_news_index() -> None:
+    redis = FakeRedis()
+    backend = CacheBackend(SimpleNamespace(redis=redis))
+    key = NEWS_INDEX.format(category="release")
+    backend.local.set(key, frozenset({1, 2}))
+
+    asyncio.run(backend.invalidate_everywhere(key))
+
+    assert backend.local.get(key) is MISSING
+    assert redis.published == [(INVALIDATION_CHANNEL, f"{PROCESS_ID}:{key}")]